@@ -442,11 +442,11 @@ async def process_question_with_permissions(chatbot, question: str, session_id:
     """
     Traite une question en utilisant les permissions utilisateur et un historique 
     associé. Cette fonction permet une gestion adaptative des entrées manquantes 
-    et fait appel à la méthode `poser_question_with_permissions` du chatbot 
+    et fait appel à la méthode `poser_question_with_permissions_async` du chatbot 
     fourni.
 
     :param chatbot: Instance de chatbot, contenant la méthode 
-        `poser_question_with_permissions`.
+        `poser_question_with_permissions_async`.
     :type chatbot: objet
     :param question: Question textuelle à traiter.
     :type question: str
@@ -469,7 +469,7 @@ async def process_question_with_permissions(chatbot, question: str, session_id:
 
     :raises ValueError: Si la question est vide ou invalide.
     :raises AttributeError: Si le chatbot ne contient pas la méthode 
-        `poser_question_with_permissions`.
+        `poser_question_with_permissions_async`.
     :raises Exception: Pour toute autre erreur non prévue durant le traitement de 
         la question ou l'exécution de la méthode du chatbot.
     """
@@ -499,8 +499,8 @@ async def process_question_with_permissions(chatbot, question: str, session_id:
         await send_progress(session_id, f"Traitement avec historique pour {username} (niveau: {user_permissions})")
 
         # VÉRIFICATION DE LA MÉTHODE DU CHATBOT
-        if not hasattr(chatbot, 'poser_question_with_permissions'):
-            await send_error(session_id, "Méthode 'poser_question_with_permissions' non trouvée dans le chatbot")
+        if not hasattr(chatbot, 'poser_question_with_permissions_async'):
+            await send_error(session_id, "Méthode 'poser_question_with_permissions_async' non trouvée dans le chatbot")
             raise AttributeError("Méthode chatbot manquante")
 
         # Capturer les sorties des agents
@@ -515,7 +515,7 @@ async def process_question_with_permissions(chatbot, question: str, session_id:
 
                 print(f"[ERROR TRACE] Avant appel chatbot", file=sys.stderr)
 
-                response = chatbot.poser_question_with_permissions(
+                response = await chatbot.poser_question_with_permissions_async(
                     question,
                     session_id=session_id,
                     user_permissions=user_permissions,
@@ -529,7 +529,7 @@ async def process_question_with_permissions(chatbot, question: str, session_id:
             except TypeError as e:
                 await send_error(session_id, f"Erreur paramètres chatbot: {e}")
                 # Tentative avec paramètres simplifiés (sans historique)
-                response = chatbot.poser_question_with_permissions(question, session_id, user_permissions)
+                response = await chatbot.poser_question_with_permissions_async(question, session_id, user_permissions)
 
         # Récupérer les logs capturés 
         captured_text = captured_output.getvalue()
@@ -690,6 +690,7 @@ async def main_async():
     email = validation_result['email'] 
 
     original_dir = None
+    chatbot = None
 
     print(f"[BACKEND] Démarré pour {user_role} - User: {username} - Session: {session_id}", file=sys.stderr)
     print(f"[BACKEND] Permissions: {user_permissions}", file=sys.stderr)
@@ -768,7 +769,9 @@ async def main_async():
         return False
 
     finally:
-        # Nettoyage
+        # Nettoyage : attendre les sauvegardes d'historique avant de changer de répertoire
+        if chatbot is not None and hasattr(chatbot, 'close'):
+            chatbot.close()
         if original_dir:
             try:
                 os.chdir(original_dir)
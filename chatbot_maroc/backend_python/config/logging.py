@@ -1,5 +1,10 @@
+import atexit
 import logging
 import logging.handlers
+import queue
+import sys
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 import json
@@ -41,6 +46,8 @@ def setup_logging(settings) -> logging.Logger:
     if logger.handlers:
         return logger
 
+    handlers = []
+
     # 1. Handler pour fichier principal (JSON structured)
     main_handler = logging.handlers.RotatingFileHandler(
         log_dir / "chatbot.log",
@@ -48,7 +55,7 @@ def setup_logging(settings) -> logging.Logger:
         backupCount=5
     )
     main_handler.setFormatter(JsonFormatter())
-    logger.addHandler(main_handler)
+    handlers.append(main_handler)
 
     # 2. Handler pour erreurs séparées
     error_handler = logging.handlers.RotatingFileHandler(
@@ -58,7 +65,7 @@ def setup_logging(settings) -> logging.Logger:
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(JsonFormatter())
-    logger.addHandler(error_handler)
+    handlers.append(error_handler)
 
     # 3. Handler console (pour développement)
     if settings.debug:
@@ -67,11 +74,153 @@ def setup_logging(settings) -> logging.Logger:
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
+
+    # Les écritures disque sont faites par un thread dédié : les appels
+    # logger.info() du chemin de requête ne font qu'empiler l'enregistrement
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
     return logger
 
 
+class ProgressHandler(logging.Handler):
+    """
+    Handler qui transmet au frontend les enregistrements portant un attribut
+    ``progress`` (passé via ``extra={"progress": ...}``), sous la forme d'une ligne
+    ``PROGRESS:<message>`` écrite par le :class:`ProgressWriter` du processus.
+    Les autres enregistrements sont ignorés. Il est attaché au logger renvoyé par
+    :func:`get_progress_logger`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.addFilter(lambda record: getattr(record, "progress", None) is not None)
+
+    def emit(self, record):
+        get_progress_writer().write(f"PROGRESS:{record.progress}")
+
+
+class ProgressWriter:
+    """
+    Écrit les lignes de progression destinées au frontend sur ``sys.stderr`` depuis un
+    thread dédié. Les messages sont regroupés par lots (jusqu'à ``max_batch``
+    messages ou ``flush_interval`` secondes) et écrits en un seul appel, ce qui évite que
+    chaque requête prenne le verrou de ``sys.stderr``. Les lignes passent par le même
+    flux que les autres sorties stderr du processus : elles ne s'y entremêlent pas.
+    """
+
+    _STOP = object()
+
+    def __init__(self, stream=None, max_batch: int = 64, flush_interval: float = 0.005):
+        # None : sys.stderr résolu à chaque écriture (il peut être remplacé après coup)
+        self._stream = stream
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._ferme = False
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, line: str):
+        """Ajoute une ligne (sans retour chariot final) à la file d'écriture."""
+        if self._ferme:
+            # Après close() (journaux émis pendant l'arrêt) : écriture directe
+            self._flush([line])
+        else:
+            self._queue.put(line)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch):
+        stream = self._stream or sys.stderr
+        try:
+            stream.write("".join(f"{line}\n" for line in batch))
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    def close(self):
+        """
+        Arrête le thread d'écriture puis écrit depuis l'appelant les lignes encore en
+        file : les dernières lignes de progression ne sont pas perdues à la sortie,
+        même si le thread n'a pas fini dans le délai d'attente.
+        """
+        self._ferme = True
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout=1.0)
+        restantes = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                restantes.append(item)
+        if restantes:
+            self._flush(restantes)
+
+
+_progress_writer = None
+_progress_writer_lock = threading.Lock()
+
+
+def get_progress_writer() -> ProgressWriter:
+    """Singleton du writer de progression partagé par tout le processus"""
+    global _progress_writer
+    if _progress_writer is None:
+        with _progress_writer_lock:
+            if _progress_writer is None:
+                _progress_writer = ProgressWriter()
+    return _progress_writer
+
+
+_progress_logger_lock = threading.Lock()
+
+
+def get_progress_logger() -> logging.Logger:
+    """
+    Logger dédié aux lignes PROGRESS du frontend. Il reste au niveau INFO et ne
+    propage pas ses enregistrements : ``LOG_LEVEL`` ne masque donc pas la
+    progression et les fichiers de logs ne la reçoivent pas en double.
+    """
+    progress_logger = logging.getLogger("chatbot_maroc.progress")
+    if not progress_logger.handlers:
+        with _progress_logger_lock:
+            if not progress_logger.handlers:
+                progress_logger.setLevel(logging.INFO)
+                progress_logger.propagate = False
+                progress_logger.addHandler(ProgressHandler())
+    return progress_logger
+
+
 class PerformanceLogger:
     """Logger pour métriques de performance"""
 
@@ -79,16 +228,28 @@ class PerformanceLogger:
         self.settings = settings
         self.metrics_logger = logging.getLogger("chatbot_maroc.metrics")
 
-        # Handler spécifique pour métriques
-        metrics_handler = logging.handlers.RotatingFileHandler(
-            Path(settings.log_dir) / "metrics.log",
-            maxBytes=5 * 1024 * 1024,
-            backupCount=3
-        )
-        metrics_handler.setFormatter(JsonFormatter())
+        # Handler spécifique pour métriques (créé une seule fois par processus)
         if not self.metrics_logger.handlers:
+            metrics_handler = logging.handlers.RotatingFileHandler(
+                Path(settings.log_dir) / "metrics.log",
+                maxBytes=5 * 1024 * 1024,
+                backupCount=3
+            )
+            metrics_handler.setFormatter(JsonFormatter())
             self.metrics_logger.addHandler(metrics_handler)
 
+    def time_request(self, question: str) -> "RequestTimer":
+        """
+        Mesure la durée d'une requête et journalise ses métriques à la sortie du bloc
+        ``with``, en succès comme en échec.
+
+        :param question: Question traitée, dont seule la longueur est journalisée.
+        :type question: str
+        :return: Le chronomètre à utiliser comme gestionnaire de contexte.
+        :rtype: RequestTimer
+        """
+        return RequestTimer(self, question)
+
     def log_request_metrics(self, question: str, duration: float, success: bool, error: str = None):
         """Log métriques d'une requête"""
         metrics = {
@@ -98,4 +259,35 @@ class PerformanceLogger:
             'success': success,
             'error': error
         }
-        self.metrics_logger.info(f"Request metrics: {json.dumps(metrics)}")
\ No newline at end of file
+        self.metrics_logger.info(f"Request metrics: {json.dumps(metrics)}")
+
+class RequestTimer:
+    """
+    Chronomètre d'une requête basé sur ``time.perf_counter_ns`` (monotone). À la
+    sortie du bloc ``with``, les métriques sont journalisées une seule fois : en échec
+    si :meth:`echec` a été appelée ou si une exception s'est propagée, en succès sinon.
+    """
+
+    __slots__ = ("_perf_logger", "question", "error", "duration", "_start_ns")
+
+    def __init__(self, perf_logger: PerformanceLogger, question: str):
+        self._perf_logger = perf_logger
+        self.question = question
+        self.error = None
+        self.duration = None
+        self._start_ns = None
+
+    def __enter__(self) -> "RequestTimer":
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def echec(self, error: str):
+        """Marque la requête comme échouée avec le message d'erreur donné."""
+        self.error = error
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = (time.perf_counter_ns() - self._start_ns) / 1e9
+        if exc_type is not None and issubclass(exc_type, Exception) and self.error is None:
+            self.error = str(exc)
+        self._perf_logger.log_request_metrics(self.question, self.duration, self.error is None, self.error)
+        return False
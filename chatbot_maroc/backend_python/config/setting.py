@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
 
@@ -25,15 +25,16 @@ class ChatbotSettings(BaseSettings):
     # Logging
     log_level: str = Field(default="INFO", description="Niveau de log")
 
+    # Cache des réponses
+    enable_semantic_cache: bool = Field(default=True,
+                                        description="Réutiliser la réponse d'une question quasi identique")
+    semantic_cache_threshold: float = Field(default=0.95,
+                                            description="Similarité cosinus minimale pour un hit sémantique")
 
 
-# Instance globale
-_settings: Optional[ChatbotSettings] = None
-
 
+# Instance globale
+@lru_cache(maxsize=1)
 def get_settings() -> ChatbotSettings:
     """Singleton pour récupérer les settings"""
-    global _settings
-    if _settings is None:
-        _settings = ChatbotSettings(gemini_api_key=os.getenv("GEMINI_API_KEY"))
-    return _settings
\ No newline at end of file
+    return ChatbotSettings(gemini_api_key=os.getenv("GEMINI_API_KEY"))
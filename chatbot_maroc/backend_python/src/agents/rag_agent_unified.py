@@ -42,6 +42,10 @@ class RAGAgentUnified:
         la recherche de tableaux et PDF, le filtrage des documents autorisés, et le
         chargement des documents complets en fonction des autorisations et des types.
 
+        Enchaîne séquentiellement :meth:`rechercher_documents`, :meth:`charger_tableaux`,
+        :meth:`charger_pdfs` et :meth:`finaliser_chargement`. Dans le graphe du chatbot,
+        les deux chargements sont exécutés en parallèle par des nœuds distincts.
+
         :param state:
             Un objet `ChatbotState` représentant l'état actuel de la session de chatbot.
             Il doit contenir des informations nécessaires, telles que la question de
@@ -51,6 +55,26 @@ class RAGAgentUnified:
             Un objet `ChatbotState` mis à jour avec les résultats organisés et filtrés
             selon les autorisations et la disponibilité des documents.
         """
+        self.rechercher_documents(state)
+        if not state.get('documents_trouves'):
+            return state
+
+        state.update(self.charger_tableaux(state))
+        state.update(self.charger_pdfs(state))
+        return self.finaliser_chargement(state)
+
+    def rechercher_documents(self, state: ChatbotState) -> ChatbotState:
+        """
+        Valide la question, lance la recherche RAG, filtre les documents selon le rôle
+        de l'utilisateur puis les répartit entre Excel (``tableaux_pertinents``) et PDF
+        (``pdfs_pertinents``). Aucun document n'est chargé à cette étape.
+
+        :param state: État actuel du chatbot contenant la question et le rôle utilisateur.
+        :type state: ChatbotState
+        :return: L'état mis à jour ; ``documents_trouves`` est vide si aucun document
+            accessible n'a été trouvé.
+        :rtype: ChatbotState
+        """
 
         self.chatbot._log("Agent RAG Unifié: Démarrage de la recherche", state)
         session_id = state.get('session_id')
@@ -156,94 +180,130 @@ class RAGAgentUnified:
                 f"Agent RAG: {len(tableaux_autorises)} Excel + {len(pdfs_autorises)} PDFs accessibles au rôle '{user_role}'",
                 state)
 
-            # CHARGEMENT UNIFIÉ DES DOCUMENTS
-            documents_complets = []
+            return state
 
-            # Traitement des Excel
-            for i, tableau_info in enumerate(tableaux_autorises):
-                try:
-                    tableau_path = tableau_info.get('tableau_path')
-                    if not tableau_path:
-                        self.chatbot._log(f"Excel {i + 1}: Chemin manquant", state)
-                        continue
+        except Exception as e:
+            self.chatbot._log_error(f"Agent RAG Unifié: {str(e)}", state)
+            self._nettoyer_etat_zero_documents(state, f"Erreur: {str(e)}")
+            return state
 
-                    donnees_completes = self.rag.get_tableau_data(tableau_path)
-                    if self._valider_donnees_tableau(donnees_completes):
-                        donnees_completes['access_level'] = tableau_info.get('access_level', 'public')
-                        donnees_completes['document_type'] = 'excel'
-                        documents_complets.append(donnees_completes)
-
-                        titre = donnees_completes.get('titre_contextuel', f'Excel {i + 1}')
-                        access_level = tableau_info.get('access_level', 'public')
-                        nb_lignes = len(donnees_completes.get('tableau', [])) - 1
-                        self.chatbot._log(f" Excel chargé: {titre} [{nb_lignes} lignes] [niveau: {access_level}]",
-                                          state)
-                    else:
-                        self.chatbot._log(f" Excel {i + 1} invalide", state)
+    def charger_tableaux(self, state: ChatbotState) -> Dict:
+        """
+        Charge les données complètes des tableaux Excel retenus par
+        :meth:`rechercher_documents`.
 
-                except Exception as e:
-                    self.chatbot._log_error(f"Chargement Excel {i + 1}: {str(e)}", state)
+        Ne renvoie que les champs Excel de l'état, pour pouvoir s'exécuter en parallèle
+        de :meth:`charger_pdfs` dans le graphe.
 
-            # Traitement des PDFs
-            for i, pdf_info in enumerate(pdfs_autorises):
-                try:
-                    pdf_path = pdf_info.get('tableau_path')
-                    if not pdf_path:
-                        self.chatbot._log(f"PDF {i + 1}: Chemin manquant", state)
-                        continue
+        :param state: État contenant ``tableaux_pertinents``.
+        :type state: ChatbotState
+        :return: Mise à jour partielle ``tableaux_charges`` / ``tableaux_reference``.
+        :rtype: Dict
+        """
+        tableaux_complets = []
+
+        # Traitement des Excel
+        for i, tableau_info in enumerate(state.get('tableaux_pertinents') or ()):
+            try:
+                tableau_path = tableau_info.get('tableau_path')
+                if not tableau_path:
+                    self.chatbot._log(f"Excel {i + 1}: Chemin manquant", state)
+                    continue
 
-                    # Pour les PDFs, créer structure minimale
-                    if pdf_path.endswith('.pdf'):
-                        donnees_pdf = {
-                            'type': 'pdf',
-                            'pdf_path': pdf_path,
-                            'titre_contextuel': pdf_info.get('titre', f'PDF {i + 1}'),
-                            'fichier_source': pdf_info.get('source', pdf_path),
-                            'description': pdf_info.get('description', 'Document PDF'),
-                            'access_level': pdf_info.get('access_level', 'public'),
-                            'document_type': 'pdf',
-                            'id': pdf_info.get('id', f'pdf_{i}')
-                        }
-
-                        documents_complets.append(donnees_pdf)
-                        titre = donnees_pdf.get('titre_contextuel', f'PDF {i + 1}')
-                        access_level = pdf_info.get('access_level', 'public')
-                        self.chatbot._log(f" PDF préparé: {titre} [niveau: {access_level}]", state)
-                    else:
-                        self.chatbot._log(f" PDF {i + 1}: Extension invalide", state)
+                donnees_completes = self.rag.get_tableau_data(tableau_path)
+                if self._valider_donnees_tableau(donnees_completes):
+                    donnees_completes['access_level'] = tableau_info.get('access_level', 'public')
+                    donnees_completes['document_type'] = 'excel'
+                    tableaux_complets.append(donnees_completes)
+
+                    titre = donnees_completes.get('titre_contextuel', f'Excel {i + 1}')
+                    access_level = tableau_info.get('access_level', 'public')
+                    nb_lignes = len(donnees_completes.get('tableau', [])) - 1
+                    self.chatbot._log(f" Excel chargé: {titre} [{nb_lignes} lignes] [niveau: {access_level}]",
+                                      state)
+                else:
+                    self.chatbot._log(f" Excel {i + 1} invalide", state)
 
-                except Exception as e:
-                    self.chatbot._log_error(f"Chargement PDF {i + 1}: {str(e)}", state)
-
-            # Séparer à la fin
-            tableaux_complets = [doc for doc in documents_complets if doc.get('document_type') == 'excel']
-            pdfs_complets = [doc for doc in documents_complets if doc.get('document_type') == 'pdf']
-
-            # Stockage final
-            state['tableaux_charges'] = tableaux_complets
-            state['pdfs_charges'] = pdfs_complets
-            state['tableaux_reference'] = tableaux_complets
-
-            # Vérification finale
-            total_documents = len(tableaux_complets) + len(pdfs_complets)
-            if total_documents == 0:
-                self.chatbot._log("Agent RAG: Aucun document valide après chargement", state)
-                self._nettoyer_etat_zero_documents(state, "Aucun document valide après chargement")
-                return state
+            except Exception as e:
+                self.chatbot._log_error(f"Chargement Excel {i + 1}: {str(e)}", state)
 
-            self.chatbot._log(f" Chargement terminé: {len(tableaux_complets)} Excel + {len(pdfs_complets)} PDFs",
-                              state)
-            _send_to_frontend(session_id,
-                              f"Chargement terminé: {len(tableaux_complets)} Excel + {len(pdfs_complets)} PDFs",
-                              "SUCCESS")
+        return {'tableaux_charges': tableaux_complets, 'tableaux_reference': tableaux_complets}
 
-            return state
+    def charger_pdfs(self, state: ChatbotState) -> Dict:
+        """
+        Prépare la structure des documents PDF retenus par :meth:`rechercher_documents`.
 
-        except Exception as e:
-            self.chatbot._log_error(f"Agent RAG Unifié: {str(e)}", state)
-            self._nettoyer_etat_zero_documents(state, f"Erreur: {str(e)}")
+        Ne renvoie que les champs PDF de l'état, pour pouvoir s'exécuter en parallèle
+        de :meth:`charger_tableaux` dans le graphe.
+
+        :param state: État contenant ``pdfs_pertinents``.
+        :type state: ChatbotState
+        :return: Mise à jour partielle ``pdfs_charges``.
+        :rtype: Dict
+        """
+        pdfs_complets = []
+
+        # Traitement des PDFs
+        for i, pdf_info in enumerate(state.get('pdfs_pertinents') or ()):
+            try:
+                pdf_path = pdf_info.get('tableau_path')
+                if not pdf_path:
+                    self.chatbot._log(f"PDF {i + 1}: Chemin manquant", state)
+                    continue
+
+                # Pour les PDFs, créer structure minimale
+                if pdf_path.endswith('.pdf'):
+                    donnees_pdf = {
+                        'type': 'pdf',
+                        'pdf_path': pdf_path,
+                        'titre_contextuel': pdf_info.get('titre', f'PDF {i + 1}'),
+                        'fichier_source': pdf_info.get('source', pdf_path),
+                        'description': pdf_info.get('description', 'Document PDF'),
+                        'access_level': pdf_info.get('access_level', 'public'),
+                        'document_type': 'pdf',
+                        'id': pdf_info.get('id', f'pdf_{i}')
+                    }
+
+                    pdfs_complets.append(donnees_pdf)
+                    titre = donnees_pdf.get('titre_contextuel', f'PDF {i + 1}')
+                    access_level = pdf_info.get('access_level', 'public')
+                    self.chatbot._log(f" PDF préparé: {titre} [niveau: {access_level}]", state)
+                else:
+                    self.chatbot._log(f" PDF {i + 1}: Extension invalide", state)
+
+            except Exception as e:
+                self.chatbot._log_error(f"Chargement PDF {i + 1}: {str(e)}", state)
+
+        return {'pdfs_charges': pdfs_complets}
+
+    def finaliser_chargement(self, state: ChatbotState) -> ChatbotState:
+        """
+        Vérifie qu'au moins un document a été chargé après les chargements Excel et PDF
+        et notifie le frontend ; l'état est nettoyé sinon.
+
+        :param state: État contenant ``tableaux_charges`` et ``pdfs_charges``.
+        :type state: ChatbotState
+        :return: L'état mis à jour.
+        :rtype: ChatbotState
+        """
+        tableaux_complets = state.get('tableaux_charges') or []
+        pdfs_complets = state.get('pdfs_charges') or []
+
+        # Vérification finale
+        total_documents = len(tableaux_complets) + len(pdfs_complets)
+        if total_documents == 0:
+            self.chatbot._log("Agent RAG: Aucun document valide après chargement", state)
+            self._nettoyer_etat_zero_documents(state, "Aucun document valide après chargement")
             return state
 
+        self.chatbot._log(f" Chargement terminé: {len(tableaux_complets)} Excel + {len(pdfs_complets)} PDFs",
+                          state)
+        _send_to_frontend(state.get('session_id'),
+                          f"Chargement terminé: {len(tableaux_complets)} Excel + {len(pdfs_complets)} PDFs",
+                          "SUCCESS")
+
+        return state
+
     def _nettoyer_etat_zero_documents(self, state: ChatbotState, raison: str):
         """
         Nettoie l'état du chatbot en réinitialisant les attributs liés aux
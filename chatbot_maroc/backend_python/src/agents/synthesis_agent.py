@@ -2,8 +2,8 @@ import pandas as pd
 from typing import Dict, List
 from ..core.state import ChatbotState
 from ..utils.message_to_front import _send_to_frontend
-from ..core.memory_store import conversation_memory, get_user_context
-import sys
+from ..core.memory_store import get_conversation_memory, get_user_context
+from langgraph.config import get_stream_writer
 
 
 class SynthesisAgent:
@@ -59,7 +59,8 @@ class SynthesisAgent:
         :rtype: ChatbotState
         """
         """Point d'entrée principal de l'agent"""
-        print(f"[DEBUG {self.__class__.__name__}] self.chatbot.user_permissions: {self.chatbot.user_permissions}",file=sys.stderr)
+        self.chatbot.logger.debug("[%s] self.chatbot.user_permissions: %s", self.__class__.__name__,
+                                  self.chatbot.user_permissions)
         return self.agent_synthese(state)
 
     def agent_synthese(self, state: ChatbotState) -> ChatbotState:
@@ -144,15 +145,28 @@ class SynthesisAgent:
 
     RÉPONSE:"""
 
-            response = self.gemini_model.generate_content(prompt_unifie)
-            reponse_unifiee = response.text
-
+            # Génération en streaming : chaque morceau est relayé au flux "custom" de
+            # LangGraph dès sa réception (sans effet hors de graph.stream/astream)
+            ecrire_morceau = self._get_stream_writer()
+            morceaux = []
+            for chunk in self.gemini_model.generate_content(prompt_unifie, stream=True):
+                try:
+                    texte = chunk.text
+                except ValueError:
+                    continue
+                morceaux.append(texte)
+                ecrire_morceau({"synthese": texte})
+            # Réponse vide (tous les morceaux bloqués) : bascule sur le fallback
+            if not morceaux:
+                raise ValueError("Réponse Gemini vide ou bloquée")
+            reponse_unifiee = "".join(morceaux)
 
             state['reponse_finale'] = reponse_unifiee
+            state['synthese_reussie'] = True
 
             # Sauvegarder dans l'historique
             if username and email:
-                success = conversation_memory.save_conversation(
+                success = get_conversation_memory().save_conversation(
                     username=username,
                     email=email,
                     question=state['question_utilisateur'],
@@ -181,6 +195,17 @@ class SynthesisAgent:
 
         return state
 
+    @staticmethod
+    def _get_stream_writer():
+        """
+        Retourne le writer de flux LangGraph du nœud courant, ou une fonction sans
+        effet si l'agent est appelé en dehors d'une exécution de graphe.
+        """
+        try:
+            return get_stream_writer()
+        except RuntimeError:
+            return lambda _: None
+
     def _extract_user_info(self, state: ChatbotState) -> tuple:
         """
         Extrait les informations de l'utilisateur depuis l'état d'un chatbot. Cette méthode analyse
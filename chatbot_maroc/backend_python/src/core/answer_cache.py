@@ -0,0 +1,175 @@
+import hashlib
+import re
+import threading
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+from cachetools import TTLCache
+
+# Nombres (années, montants, quantités) présents dans une question
+_NOMBRES_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def normaliser_question(question: str) -> str:
+    """
+    Normalise une question pour en faire une clé de cache stable : suppression
+    des espaces superflus et passage en minuscules.
+
+    :param question: Question brute posée par l'utilisateur.
+    :type question: str
+    :return: La question normalisée.
+    :rtype: str
+    """
+    return " ".join(question.split()).lower()
+
+
+def extraire_nombres(question_norm: str) -> Tuple[str, ...]:
+    """
+    Extrait, dans l'ordre, les nombres d'une question normalisée.
+
+    :param question_norm: Question normalisée par :func:`normaliser_question`.
+    :type question_norm: str
+    :return: Les nombres trouvés, sous forme de chaînes.
+    :rtype: Tuple[str, ...]
+    """
+    return tuple(_NOMBRES_RE.findall(question_norm))
+
+
+class AnswerCache:
+    """
+    Cache de réponses à deux niveaux placé devant le graphe d'agents.
+
+    Le premier niveau est une correspondance exacte sur la question normalisée
+    (hachée en SHA-1) et le contexte d'accès de l'utilisateur. Le second niveau est
+    une recherche par similarité cosinus sur les embeddings des dernières questions
+    posées : si une question quasi identique a déjà reçu une réponse pour le même
+    contexte d'accès, cette réponse est réutilisée sans relancer RAG ni Gemini. Un
+    hit sémantique exige en plus les mêmes nombres dans les deux questions : les
+    embeddings distinguent mal « exportations 2020 » de « exportations 2021 ».
+
+    :ivar embedding_model: Modèle d'embeddings (interface ``encode``) utilisé pour la
+        recherche sémantique. Si ``None``, seul le niveau exact est actif.
+    :ivar similarity_threshold: Similarité cosinus minimale pour un hit sémantique.
+    :type similarity_threshold: float
+    """
+
+    def __init__(self, embedding_model=None, maxsize: int = 2048, ttl: int = 600,
+                 max_embeddings: int = 256, similarity_threshold: float = 0.95):
+        """
+        Initialise le cache.
+
+        :param embedding_model: Modèle d'embeddings réutilisé depuis l'index RAG.
+        :param maxsize: Nombre maximum de réponses conservées.
+        :type maxsize: int
+        :param ttl: Durée de vie d'une réponse en secondes.
+        :type ttl: int
+        :param max_embeddings: Nombre de questions récentes conservées pour la
+            recherche sémantique.
+        :type max_embeddings: int
+        :param similarity_threshold: Seuil de similarité cosinus pour un hit sémantique.
+        :type similarity_threshold: float
+        """
+        self.embedding_model = embedding_model
+        self.similarity_threshold = similarity_threshold
+        self._reponses = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._embeddings = deque(maxlen=max_embeddings)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cle(question_norm: str, contexte: Tuple) -> Tuple:
+        return hashlib.sha1(question_norm.encode("utf-8")).hexdigest(), contexte
+
+    def _encoder(self, question_norm: str) -> Optional[np.ndarray]:
+        if self.embedding_model is None:
+            return None
+        try:
+            vecteur = np.asarray(self.embedding_model.encode([question_norm], convert_to_tensor=False)[0],
+                                 dtype=np.float32)
+        except Exception:
+            return None
+        norme = np.linalg.norm(vecteur)
+        return vecteur / norme if norme else None
+
+    def get(self, question: str, contexte: Tuple) -> Optional[str]:
+        """
+        Cherche une réponse en cache pour la question et le contexte d'accès donnés.
+
+        :param question: Question posée par l'utilisateur.
+        :type question: str
+        :param contexte: Tuple hachable décrivant le contexte d'accès (rôle,
+            permissions, utilisateur).
+        :type contexte: Tuple
+        :return: La réponse en cache, ou ``None`` si aucune entrée ne correspond.
+        :rtype: Optional[str]
+        """
+        question_norm = normaliser_question(question)
+        cle = self._cle(question_norm, contexte)
+
+        with self._lock:
+            reponse = self._reponses.get(cle)
+            if reponse is not None or not self._embeddings:
+                return reponse
+
+        vecteur = self._encoder(question_norm)
+        if vecteur is None:
+            return None
+
+        with self._lock:
+            nombres = extraire_nombres(question_norm)
+            candidats = [(emb, c) for emb, c, n in self._embeddings
+                         if c[1] == contexte and n == nombres and c in self._reponses]
+            if not candidats:
+                return None
+            similarites = np.stack([emb for emb, _ in candidats]) @ vecteur
+            meilleur = int(np.argmax(similarites))
+            if similarites[meilleur] >= self.similarity_threshold:
+                return self._reponses.get(candidats[meilleur][1])
+        return None
+
+    def set(self, question: str, contexte: Tuple, reponse: str):
+        """
+        Enregistre la réponse associée à une question et à un contexte d'accès.
+
+        :param question: Question posée par l'utilisateur.
+        :type question: str
+        :param contexte: Tuple hachable décrivant le contexte d'accès (rôle,
+            permissions, utilisateur).
+        :type contexte: Tuple
+        :param reponse: Réponse finale enrichie à mettre en cache.
+        :type reponse: str
+        """
+        question_norm = normaliser_question(question)
+        cle = self._cle(question_norm, contexte)
+        vecteur = self._encoder(question_norm)
+
+        with self._lock:
+            self._reponses[cle] = reponse
+            if vecteur is not None:
+                self._embeddings.append((vecteur, cle, extraire_nombres(question_norm)))
+
+    def invalider(self, predicat: Callable[[Tuple], bool]) -> int:
+        """
+        Retire des deux niveaux les réponses dont le contexte satisfait ``predicat``,
+        par exemple toutes celles d'un utilisateur dont l'historique a été supprimé.
+
+        :param predicat: Fonction appelée avec le contexte de chaque entrée.
+        :type predicat: Callable[[Tuple], bool]
+        :return: Le nombre de réponses retirées.
+        :rtype: int
+        """
+        with self._lock:
+            cles = [cle for cle in self._reponses if predicat(cle[1])]
+            for cle in cles:
+                del self._reponses[cle]
+            if cles:
+                retenus = [entree for entree in self._embeddings if not predicat(entree[1][1])]
+                self._embeddings.clear()
+                self._embeddings.extend(retenus)
+        return len(cles)
+
+    def clear(self):
+        """Vide les deux niveaux du cache."""
+        with self._lock:
+            self._reponses.clear()
+            self._embeddings.clear()
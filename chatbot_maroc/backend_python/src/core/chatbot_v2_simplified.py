@@ -1,8 +1,14 @@
-import time
+import asyncio
+import re
+from collections import Counter
+from itertools import chain
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from langgraph.graph import StateGraph, END
-import google.generativeai as genai
-import sys
-from typing import List
+from langgraph.types import Send
+from langchain_core.runnables import RunnableConfig
+from typing import AsyncIterator, Dict, List, Optional
 
 from .state import ChatbotState
 from ..agents.pandas_agent import SimplePandasAgent
@@ -14,15 +20,244 @@ from ..agents.rag_agent_unified import RAGAgentUnified
 from ..agents.selector_agent_unified import SelectorAgentUnified
 from ..agents.analyzer_agent_unified import AnalyzerAgentUnified
 
-from ..core.memory_store import conversation_memory
-from dotenv import load_dotenv
-import os
-load_dotenv()
-
-sys.path[:0] = ['../../']
-from config.logging import setup_logging, PerformanceLogger
+from ..core.memory_store import get_conversation_memory
+from .answer_cache import AnswerCache
+# config.setting charge le fichier .env à son import
+from config.logging import setup_logging, get_progress_logger, PerformanceLogger, RequestTimer
 from config.setting import get_settings
 
+_GENAI_CONFIGURED = False
+_GENAI_LOCK = threading.Lock()
+
+
+def _configurer_genai():
+    """Configure la clé API Gemini une seule fois par processus."""
+    global _GENAI_CONFIGURED
+    if _GENAI_CONFIGURED:
+        return
+    with _GENAI_LOCK:
+        if not _GENAI_CONFIGURED:
+            # Import différé : coûteux et inutile tant qu'aucun chatbot n'est créé
+            import google.generativeai as genai
+            genai.configure(api_key=get_settings().gemini_api_key)
+            _GENAI_CONFIGURED = True
+
+
+@lru_cache(maxsize=1)
+def _get_gemini_model():
+    """
+    Retourne le modèle Gemini partagé par toutes les instances de chatbot
+    (le client est sans état et thread-safe).
+    """
+    _configurer_genai()
+    import google.generativeai as genai
+    return genai.GenerativeModel('gemini-2.5-flash')
+
+
+# Loggers par objet settings : {id(settings): (settings, logger, perf_logger)}.
+# L'objet settings est conservé pour que son id ne puisse pas être réutilisé.
+_LOGGERS = {}
+_LOGGERS_LOCK = threading.Lock()
+
+
+def _get_loggers(settings):
+    """
+    Retourne le logger principal et le logger de performance associés à ``settings``,
+    en les créant au premier appel.
+
+    :param settings: Configuration du chatbot.
+    :return: Le couple ``(logger, perf_logger)``.
+    :rtype: Tuple[logging.Logger, PerformanceLogger]
+    """
+    entree = _LOGGERS.get(id(settings))
+    if entree is None:
+        with _LOGGERS_LOCK:
+            entree = _LOGGERS.get(id(settings))
+            if entree is None:
+                entree = (settings, setup_logging(settings), PerformanceLogger(settings))
+                _LOGGERS[id(settings)] = entree
+    return entree[1], entree[2]
+
+
+def _importer_client_mcp():
+    """
+    Importe les fonctions d'envoi du client MCP. ``mcp_client_utils`` est rendu
+    importable par le point d'entrée (``setup_mcp_path`` de ``chatbot_wrapper``) :
+    ce module ne modifie pas ``sys.path``, et le client est le même module que
+    celui déjà chargé par le wrapper.
+
+    :return: Le couple ``(mcp_send_progress, mcp_send_error)``.
+    :rtype: tuple
+    """
+    from mcp_client_utils import mcp_send_progress, mcp_send_error
+    return mcp_send_progress, mcp_send_error
+
+
+# Questions trop courtes ou sans aucun caractère alphanumérique : rejetées sans
+# lancer RAG ni Gemini
+_QUICK_REJECT_RE = re.compile(r'^(?:\W*|.{1,2})$')
+
+# Triage en entrée du graphe : les messages entièrement conversationnels (salutations,
+# questions sur l'assistant) vont directement à la synthèse, sans recherche RAG.
+# Seuls quelques compléments fixes sont admis après une formule (« merci beaucoup ») :
+# un mot libre laisserait passer « bonjour rabat ». Toute mention d'un chiffre ou d'un
+# terme lié aux données force la recherche.
+_RE_CONVERSATION = re.compile(
+    r"(?:\W*(?:bonjour|bonsoir|salut|hello|merci|au revoir|bonne (?:journée|soirée)|"
+    r"qui es[- ]tu|tu es qui|que (?:sais|peux)[- ]tu faire|comment (?:ça|ca) va)"
+    r"(?:\s+(?:à (?:tous|toi|vous)|tout le monde|beaucoup|bien|encore))?)+\W*",
+    re.IGNORECASE
+)
+_RE_MOTS_CLES_RAG = re.compile(
+    r"\d|rapport|tableau|pdf|chiffre|statisti|donn[ée]e|nombre|combien|taux|pourcentage|"
+    r"population|r[ée]gion|ville|province|[ée]volution|investiss|export|import|emploi|secteur",
+    re.IGNORECASE
+)
+_TRIAGE_LONGUEUR_MAX = 60
+
+# Réponses pré-rédigées pour les messages courants qui n'appellent pas de recherche
+_REPONSES_FAQ = {
+    "bonjour": "Bonjour ! Posez-moi une question sur les données et statistiques du Maroc.",
+    "salut": "Bonjour ! Posez-moi une question sur les données et statistiques du Maroc.",
+    "merci": "Avec plaisir ! N'hésitez pas si vous avez d'autres questions.",
+    "aide": ("Je réponds aux questions sur les données et statistiques du Maroc à partir des "
+             "documents auxquels vous avez accès. Exemple : « Combien d'étudiants en ingénierie à Rabat ? »"),
+}
+
+
+def _reponse_immediate(question: str) -> Optional[str]:
+    """
+    Renvoie une réponse immédiate pour les questions qui ne justifient pas une
+    exécution du graphe : question vide, trop courte ou sans contenu, ou message
+    courant présent dans la FAQ.
+
+    :param question: Question brute posée par l'utilisateur.
+    :type question: str
+    :return: La réponse à renvoyer directement, ou ``None`` si le graphe doit être exécuté.
+    :rtype: Optional[str]
+    """
+    question = question.strip()
+    if not question:
+        return "Veuillez poser une question valide."
+
+    reponse_faq = _REPONSES_FAQ.get(question.lower().rstrip(" !.?"))
+    if reponse_faq is not None:
+        return reponse_faq
+
+    if _QUICK_REJECT_RE.match(question):
+        return "Veuillez préciser votre question."
+    return None
+
+
+# Niveaux d'accès comptabilisés dans le récapitulatif des sources
+_NIVEAUX_ACCES = frozenset(("public", "internal", "confidential"))
+_LIBELLES_SOURCES = (
+    ('public', "- [PUBLIC] {} document(s) public(s)\n"),
+    ('internal', "- [INTERNE] {} document(s) interne(s)\n"),
+    ('confidential', "- [CONFIDENTIEL] {} document(s) confidentiel(s)\n"),
+)
+
+
+def _vers_instance(nom_methode: str):
+    """
+    Construit un nœud (ou une fonction de routage) du graphe partagé qui délègue à la
+    méthode ``nom_methode`` de l'instance de chatbot transmise dans la configuration
+    d'exécution (``config["configurable"]["chatbot"]``).
+
+    :param nom_methode: Nom de la méthode de ``ChatbotMarocV2Simplified`` à appeler.
+    :type nom_methode: str
+    :return: Fonction ``(state, config)`` utilisable par LangGraph.
+    """
+
+    def noeud(state: ChatbotState, config: RunnableConfig):
+        return getattr(config["configurable"]["chatbot"], nom_methode)(state)
+
+    noeud.__name__ = nom_methode
+    return noeud
+
+
+def _executer_coroutine(coroutine):
+    """
+    Exécute une coroutine depuis du code synchrone. Si l'appelant tourne déjà dans
+    une boucle d'événements (``asyncio.run`` y est interdit), la coroutine est
+    exécutée dans sa propre boucle sur un thread dédié.
+
+    :param coroutine: Coroutine à exécuter.
+    :return: Le résultat de la coroutine.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="chatbot-sync") as executeur:
+        return executeur.submit(asyncio.run, coroutine).result()
+
+
+# Gabarit de l'état initial, construit une seule fois au chargement du module.
+# Les valeurs par défaut sont immuables (tuples vides) et donc partageables sans
+# risque entre les requêtes : les agents remplacent toujours ces champs par de
+# nouvelles listes. Seul 'historique' est modifié en place ; il reçoit une liste
+# neuve dans _preparer_etat_initial.
+_EMPTY_STATE_TEMPLATE: ChatbotState = ChatbotState(
+    # Champs de base
+    question_utilisateur="",
+    session_id=None,
+    user_role=None,
+    user_permissions=None,
+    username=None,
+    email=None,
+    historique=(),
+
+    # Champs RAG
+    documents_trouves=(),
+    tableaux_pertinents=(),
+    pdfs_pertinents=(),
+
+    # Champs chargement
+    tableaux_charges=(),
+    pdfs_charges=(),
+    tableaux_reference=(),
+
+    # Champs sélection
+    tableaux_pour_upload=(),
+    pdfs_pour_upload=(),
+    explication_selection=None,
+
+    # Champs analyse Excel
+    dataframes=(),
+    reponse_analyseur_brute=None,
+    besoin_calculs=False,
+    instruction_calcul=None,
+    algo_genere=None,
+    excel_empty="",
+
+    # Champs calculs
+    code_pandas=None,
+    resultat_pandas=None,
+    erreur_pandas=None,
+    fichiers_gemini=(),
+    fichiers_csvs_local=(),
+    tableau_pour_calcul=None,
+
+    # Champs analyse PDF
+    reponse_analyseur_texte_brut=None,
+    reponse_finale_pdf="",
+    sources_pdf=(),
+
+    # Champs compatibilité
+    documents_selectionnes=(),
+    pdfs_pour_contexte=(),
+    documents_excel=(),
+    documents_pdf=(),
+
+    # Résultat final
+    reponse_finale="",
+    synthese_reussie=False,
+
+    processing_mode=""
+)
+
 
 class ChatbotMarocV2Simplified:
     """
@@ -56,10 +291,27 @@ class ChatbotMarocV2Simplified:
     :type code_agent: CodeAgent
     :ivar synthesis_agent: Agent de synthèse pour générer des réponses finales après traitement.
     :type synthesis_agent: SynthesisAgent
-    :ivar graph: Graphe ultra-simplifié représentant le flux de travail entre agents.
+    :ivar graph: Graphe ultra-simplifié représentant le flux de travail entre agents,
+        compilé une seule fois par classe et partagé entre toutes les instances.
     :type graph: StateGraph
+    :ivar _answer_cache: Cache des réponses (exact puis sémantique) consulté avant le graphe.
+    :type _answer_cache: AnswerCache
+    :ivar _bg_executor: Exécuteur des tâches hors chemin critique (sauvegarde de l'historique).
+    :type _bg_executor: ThreadPoolExecutor
     """
 
+    # Indicateurs par rôle : progression frontend et en-tête des réponses
+    _ROLE_TAG = {'public': '[PUBLIC]', 'employee': '[EMPLOYE]', 'admin': '[ADMIN]'}
+    _ROLE_HDR = {
+        'public': '**Accès Public**',
+        'employee': '**Accès Employé**',
+        'admin': '**Accès Administrateur**'
+    }
+
+    # Graphes compilés partagés, indexés par classe de chatbot
+    _GRAPH_SINGLETON = {}
+    _GRAPH_LOCK = threading.Lock()
+
     def __init__(self, rag_index, user_permissions: List[str] = None, user_role: str = "guest", settings=None):
         """
         Initialise une instance de Chatbot V2 Simplifié avec les agents et
@@ -92,33 +344,91 @@ class ChatbotMarocV2Simplified:
         self.settings = get_settings() if settings is None else settings
         self.rag = rag_index
 
-        # Setup logging existant
-        self.logger = setup_logging(self.settings)
-        self.perf_logger = PerformanceLogger(self.settings)
+        # Setup logging existant, fait une seule fois par objet settings
+        self.logger, self.perf_logger = _get_loggers(self.settings)
+        self._progress_logger = get_progress_logger()
 
-        # Configuration Gemini existante
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+        # Configuration Gemini existante, partagée par toutes les instances
+        self.gemini_model = _get_gemini_model()
 
         # Support des permissions utilisateur
         self.user_permissions = user_permissions or ["read_public_docs"]
         self.user_role = user_role
+        self._role_upper = user_role.upper()
+        self._role_prefix = f"[{self._role_upper}] "
+        self._role_tag = self._ROLE_TAG.get(user_role, '[USER]')
+        self._role_hdr = self._ROLE_HDR.get(user_role, '**Accès Limité**')
+        self._debug_admin = self._construire_debug_admin()
+        self._permissions_defaut = tuple(sorted(self.user_permissions))
 
-        # Agent pandas existant
-        self.pandas_agent = SimplePandasAgent(self.gemini_model)
+        # Les agents sont créés au premier passage du graphe par leur nœud
+        # (voir les propriétés pandas_agent, rag_agent, ..., synthesis_agent)
 
-        # AGENTS UNIFIÉS (SIMPLES ET ROBUSTES)
-        self.rag_agent = RAGAgentUnified(self.rag, self)
-        self.selector_agent = SelectorAgentUnified(self.gemini_model, self)
-        self.analyzer_agent = AnalyzerAgentUnified(self.gemini_model, self)
-        self.code_agent = CodeAgent(self.gemini_model, self)
-        self.synthesis_agent = SynthesisAgent(self.gemini_model, self)
+        # Graphe LangGraph ULTRA-SIMPLIFIÉ, compilé une seule fois par processus
+        self.graph = self._get_graphe_compile()
 
-        # Créer le graphe LangGraph ULTRA-SIMPLIFIÉ
-        self.graph = self._creer_graphe_simplifie()
+        # Cache des réponses : réutilise le modèle d'embeddings de l'index RAG
+        # Le niveau sémantique du cache peut être désactivé via les settings
+        modele_embeddings = getattr(self.rag, 'embedding_model', None) if self.settings.enable_semantic_cache else None
+        self._answer_cache = AnswerCache(modele_embeddings,
+                                         similarity_threshold=self.settings.semantic_cache_threshold)
+
+        # Sauvegarde de l'historique hors du chemin critique de la réponse
+        self._bg_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chatbot-historique")
 
         print(f"Chatbot V2 Simplifié initialisé pour utilisateur {user_role} avec permissions: {user_permissions}")
 
+    # Agent pandas existant
+    @cached_property
+    def pandas_agent(self) -> SimplePandasAgent:
+        """Agent pandas, créé au premier besoin de DataFrames."""
+        return SimplePandasAgent(self.gemini_model)
+
+    # AGENTS UNIFIÉS (SIMPLES ET ROBUSTES), instanciés à la demande
+    @cached_property
+    def rag_agent(self) -> RAGAgentUnified:
+        """Agent RAG, créé au premier passage dans le nœud ``rag_unified``."""
+        return RAGAgentUnified(self.rag, self)
+
+    @cached_property
+    def selector_agent(self) -> SelectorAgentUnified:
+        """Agent de sélection, créé au premier passage dans ``selector_unified``."""
+        return SelectorAgentUnified(self.gemini_model, self)
+
+    @cached_property
+    def analyzer_agent(self) -> AnalyzerAgentUnified:
+        """Agent d'analyse, créé uniquement si des documents sont disponibles."""
+        return AnalyzerAgentUnified(self.gemini_model, self)
+
+    @cached_property
+    def code_agent(self) -> CodeAgent:
+        """Agent de génération de code, créé uniquement si des calculs sont nécessaires."""
+        return CodeAgent(self.gemini_model, self)
+
+    @cached_property
+    def synthesis_agent(self) -> SynthesisAgent:
+        """Agent de synthèse, créé au premier passage dans ``synthese``."""
+        return SynthesisAgent(self.gemini_model, self)
+
+    def _push(self, message: str, state: ChatbotState, progress: str = None):
+        """
+        Journalise un message et l'ajoute à l'historique de l'état, toujours initialisé
+        par :meth:`_preparer_etat_initial`.
+
+        :param message: Message à enregistrer.
+        :type message: str
+        :param state: Etat actuel du chatbot.
+        :type state: ChatbotState
+        :param progress: Ligne de progression à transmettre au frontend via le
+            logger de progression (indépendant de ``LOG_LEVEL``), ou ``None`` pour
+            ne rien afficher.
+        :type progress: str
+        """
+        self.logger.info(message)
+        if progress is not None:
+            self._progress_logger.info(message, extra={"progress": progress})
+        state['historique'].append(message)
+
     def _log(self, message: str, state: ChatbotState):
         """
         Enregistre un message dans l'historique d'état d'un chatbot et le journalise.
@@ -129,16 +439,7 @@ class ChatbotMarocV2Simplified:
         :param state: Etat actuel du chatbot, contenant notamment un historique des messages.
         :type state: ChatbotState
         """
-        self.logger.info(message)
-
-        # Vérifier si 'historique' existe avant d'y accéder
-        if 'historique' not in state:
-            state['historique'] = []
-
-        state['historique'].append(message)
-
-        # Ligne pour le frontend
-        print(f"PROGRESS:{message}", file=sys.stderr)
+        self._push(message, state, progress=message)
 
     def _log_with_permissions(self, message: str, state: ChatbotState):
         """
@@ -153,19 +454,8 @@ class ChatbotMarocV2Simplified:
         :return: Aucun
         :rtype: None
         """
-        enriched_message = f"[{self.user_role.upper()}] {message}"
-        self.logger.info(enriched_message)
-
-        # Vérifier si 'historique' existe avant d'y accéder
-        if 'historique' not in state:
-            state['historique'] = []
-
-        state['historique'].append(enriched_message)
-
         # Pour le frontend avec indicateur de permission
-        role_indicator = {'public': '[PUBLIC]', 'employee': '[EMPLOYE]', 'admin': '[ADMIN]'}.get(self.user_role,
-                                                                                                 '[USER]')
-        print(f"PROGRESS:{role_indicator} {message}", file=sys.stderr)
+        self._push(f"{self._role_prefix}{message}", state, progress=f"{self._role_tag} {message}")
 
     def _log_error(self, error: str, state: ChatbotState):
         """
@@ -176,18 +466,12 @@ class ChatbotMarocV2Simplified:
         :param error: Message d'erreur à enregistrer dans le journal et à ajouter à
                       l'historique.
         :type error: str
-        :param state: État courant du Chatbot contenant un éventuel historique des erreurs.
-                      Si l'historique n'existe pas dans l'état, il sera initialisé avant
-                      d'y ajouter le message d'erreur.
+        :param state: État courant du Chatbot, dont l'historique est initialisé par
+                      :meth:`_preparer_etat_initial`.
         :type state: ChatbotState
         """
         error_msg = f"ERREUR: {error}"
         self.logger.error(error_msg)
-
-        # Vérifier si 'historique' existe avant d'y accéder
-        if 'historique' not in state:
-            state['historique'] = []
-
         state['historique'].append(error_msg)
 
     def _analyzer_with_mcp(self, state):
@@ -247,7 +531,7 @@ class ChatbotMarocV2Simplified:
         self._send_mcp_sync(session_id, "progress", " Recherche de documents RAG...")
 
         try:
-            result = self.rag_agent.execute(state)
+            result = self.rag_agent.rechercher_documents(state)
             docs_found = len(state.get('documents_trouves', []))
             self._send_mcp_sync(session_id, "progress", f" Recherche terminée - {docs_found} documents trouvés")
             return result
@@ -255,6 +539,31 @@ class ChatbotMarocV2Simplified:
             self._send_mcp_sync(session_id, "error", f"Erreur recherche RAG: {str(e)}")
             raise
 
+    def _repartir_chargements(self, state: ChatbotState):
+        """
+        Fonction de routage après la recherche RAG : lance en parallèle (via ``Send``)
+        le chargement des tableaux Excel et celui des PDF trouvés. Sans document, la
+        sélection est exécutée directement.
+
+        :param state: État après la recherche RAG.
+        :type state: ChatbotState
+        :return: La liste des branches de chargement, ou ``"selector_unified"``.
+        """
+        branches = []
+        if state.get('tableaux_pertinents'):
+            branches.append(Send("rag_excel", state))
+        if state.get('pdfs_pertinents'):
+            branches.append(Send("rag_pdf", state))
+        return branches or "selector_unified"
+
+    def _charger_tableaux(self, state: ChatbotState) -> Dict:
+        """Nœud de chargement des tableaux Excel (mise à jour partielle de l'état)."""
+        return self.rag_agent.charger_tableaux(state)
+
+    def _charger_pdfs(self, state: ChatbotState) -> Dict:
+        """Nœud de préparation des PDF (mise à jour partielle de l'état)."""
+        return self.rag_agent.charger_pdfs(state)
+
     def _selector_with_mcp(self, state):
         """
         Gère le processus de sélection des documents pertinents en utilisant un agent de sélection,
@@ -270,6 +579,10 @@ class ChatbotMarocV2Simplified:
         self._send_mcp_sync(session_id, "progress", " Sélection des documents pertinents...")
 
         try:
+            # Point de jonction des chargements Excel et PDF
+            if state.get('documents_trouves'):
+                self.rag_agent.finaliser_chargement(state)
+
             result = self.selector_agent.execute(state)
             excel_count = len(state.get('tableaux_pour_upload', []))
             pdf_count = len(state.get('pdfs_pour_upload', []))
@@ -353,9 +666,6 @@ class ChatbotMarocV2Simplified:
         :return: Cette méthode ne retourne rien.
         :rtype: None
         """
-        import threading
-        import asyncio
-
         def send_async():
             """
             Envoie des messages asynchrones en fonction du type de message spécifié. Cette fonction tente
@@ -368,8 +678,7 @@ class ChatbotMarocV2Simplified:
             :rtype: None
             """
             try:
-                sys.path[:0] = ['../../../../']
-                from chatbot_maroc.message_fastapi.mcp_client_utils import mcp_send_progress, mcp_send_error
+                mcp_send_progress, mcp_send_error = _importer_client_mcp()
 
                 async def do_send():
                     """
@@ -400,7 +709,33 @@ class ChatbotMarocV2Simplified:
 
         threading.Thread(target=send_async, daemon=True).start()
 
-    def _creer_graphe_simplifie(self) -> StateGraph:
+    @classmethod
+    def _get_graphe_compile(cls) -> StateGraph:
+        """
+        Retourne le graphe compilé partagé par toutes les instances, en le créant au
+        premier appel. Les nœuds ne référencent aucune instance : le chatbot courant est
+        transmis à l'exécution via ``config["configurable"]["chatbot"]``.
+
+        Le cache est indexé par la fonction qui construit la topologie : les
+        sous-classes qui ne redéfinissent que des agents ou des méthodes de nœud
+        réutilisent le même graphe compilé, seule une redéfinition de
+        :meth:`_creer_graphe_simplifie` en compile un nouveau.
+
+        :return: Le graphe compilé partagé.
+        :rtype: StateGraph
+        """
+        signature = cls._creer_graphe_simplifie.__func__
+        graphe = cls._GRAPH_SINGLETON.get(signature)
+        if graphe is None:
+            with cls._GRAPH_LOCK:
+                graphe = cls._GRAPH_SINGLETON.get(signature)
+                if graphe is None:
+                    graphe = cls._creer_graphe_simplifie()
+                    cls._GRAPH_SINGLETON[signature] = graphe
+        return graphe
+
+    @classmethod
+    def _creer_graphe_simplifie(cls) -> StateGraph:
         """
         Crée et compile un graphe simplifié de traitement d'état pour un chatbot.
 
@@ -420,24 +755,38 @@ class ChatbotMarocV2Simplified:
 
         # NOEUDS PRINCIPAUX (SIMPLES)
         #graph.add_node("rag_unified", self.rag_agent.execute)
-        graph.add_node("rag_unified", self._rag_with_mcp)
+        graph.add_node("rag_unified", _vers_instance("_rag_with_mcp"))
+        graph.add_node("rag_excel", _vers_instance("_charger_tableaux"))
+        graph.add_node("rag_pdf", _vers_instance("_charger_pdfs"))
         #graph.add_node("selector_unified", self.selector_agent.execute)
-        graph.add_node("selector_unified", self._selector_with_mcp)
+        graph.add_node("selector_unified", _vers_instance("_selector_with_mcp"))
         #graph.add_node("analyzer_unified", self.analyzer_agent.execute)
-        graph.add_node("analyzer_unified", self._analyzer_with_mcp)
+        graph.add_node("analyzer_unified", _vers_instance("_analyzer_with_mcp"))
         #graph.add_node("generateur_code", self.code_agent.execute)
-        graph.add_node("generateur_code", self._code_with_mcp)
+        graph.add_node("generateur_code", _vers_instance("_code_with_mcp"))
         #graph.add_node("synthese", self.synthesis_agent.execute)
-        graph.add_node("synthese", self._synthese_with_mcp)
+        graph.add_node("synthese", _vers_instance("_synthese_with_mcp"))
 
-        # FLUX LINÉAIRE ULTRA-SIMPLE
-        graph.set_entry_point("rag_unified")
-        graph.add_edge("rag_unified", "selector_unified")
+        # RECHERCHE PUIS CHARGEMENTS EXCEL / PDF EN PARALLÈLE, JONCTION SUR LA SÉLECTION
+        graph.set_conditional_entry_point(
+            _vers_instance("_needs_rag"),
+            {
+                "skip_rag": "synthese",  # Message conversationnel → Synthèse directe
+                "need_rag": "rag_unified"
+            }
+        )
+        graph.add_conditional_edges(
+            "rag_unified",
+            _vers_instance("_repartir_chargements"),
+            ["rag_excel", "rag_pdf", "selector_unified"]
+        )
+        graph.add_edge("rag_excel", "selector_unified")
+        graph.add_edge("rag_pdf", "selector_unified")
 
         # Vérification documents disponibles
         graph.add_conditional_edges(
             "selector_unified",
-            self._has_documents,
+            _vers_instance("_has_documents"),
             {
                 "no_documents": "synthese",  # Aucun document → Synthèse directe
                 "has_documents": "analyzer_unified"  # Documents disponibles → Analyse
@@ -447,7 +796,7 @@ class ChatbotMarocV2Simplified:
         # UNE SEULE CONDITION : Calculs nécessaires ?
         graph.add_conditional_edges(
             "analyzer_unified",
-            self._needs_calculations,
+            _vers_instance("_needs_calculations"),
             {
                 "calculations": "generateur_code",  # Calculs détectés → Code
                 "direct": "synthese"  # Réponse directe → Synthèse
@@ -462,6 +811,24 @@ class ChatbotMarocV2Simplified:
 
         return graph.compile()
 
+    def _needs_rag(self, state: ChatbotState) -> str:
+        """
+        Point d'entrée conditionnel du graphe : les messages courts et purement
+        conversationnels sont envoyés directement à la synthèse, les autres passent par
+        la recherche RAG.
+
+        :param state: État initial de la requête.
+        :type state: ChatbotState
+        :return: ``"skip_rag"`` ou ``"need_rag"``.
+        :rtype: str
+        """
+        question = state.get('question_utilisateur') or ""
+        if (len(question) <= _TRIAGE_LONGUEUR_MAX and _RE_CONVERSATION.fullmatch(question)
+                and not _RE_MOTS_CLES_RAG.search(question)):
+            self._log("Question conversationnelle - recherche documentaire ignorée", state)
+            return "skip_rag"
+        return "need_rag"
+
     def _has_documents(self, state: ChatbotState) -> str:
         """
         Détermine si des documents sont disponibles pour le traitement en fonction de
@@ -477,17 +844,15 @@ class ChatbotMarocV2Simplified:
             ou non ("no_documents").
         :rtype: str
         """
-        tableaux = state.get('tableaux_pour_upload', [])
-        pdfs = state.get('pdfs_pour_upload', [])
-
-        total_documents = len(tableaux) + len(pdfs)
+        nb_tableaux = len(state.get('tableaux_pour_upload') or ())
+        nb_pdfs = len(state.get('pdfs_pour_upload') or ())
 
-        if total_documents > 0:
-            self._log(f"Documents disponibles: {len(tableaux)} Excel + {len(pdfs)} PDFs", state)
+        if nb_tableaux or nb_pdfs:
+            self._log(f"Documents disponibles: {nb_tableaux} Excel + {nb_pdfs} PDFs", state)
             return "has_documents"
-        else:
-            self._log("Aucun document disponible pour traitement", state)
-            return "no_documents"
+
+        self._log("Aucun document disponible pour traitement", state)
+        return "no_documents"
 
     def _needs_calculations(self, state: ChatbotState) -> str:
         """
@@ -507,22 +872,21 @@ class ChatbotMarocV2Simplified:
         :rtype: str
         """
 
-        besoin_calculs = state.get('besoin_calculs', False)
-
-        if besoin_calculs:
-            # Vérifier que les prérequis sont présents
-            if state.get('algo_genere') and state.get('instruction_calcul') and state.get('dataframes'):
-                self._log("CALCULS NÉCESSAIRES - Génération de code", state)
-                return "calculations"
-            else:
-                # Problème avec les prérequis calculs
-                self._log("ERREUR: Calculs demandés mais prérequis manquants - Synthèse directe", state)
-                return "direct"
-        else:
+        if not state.get('besoin_calculs'):
             # Réponse directe ou pas de calculs nécessaires
             self._log("PAS DE CALCULS - Synthèse directe", state)
             return "direct"
 
+        # Vérifier que les prérequis sont présents (une seule lecture par champ)
+        get = state.get
+        if get('algo_genere') and get('instruction_calcul') and get('dataframes'):
+            self._log("CALCULS NÉCESSAIRES - Génération de code", state)
+            return "calculations"
+
+        # Problème avec les prérequis calculs
+        self._log("ERREUR: Calculs demandés mais prérequis manquants - Synthèse directe", state)
+        return "direct"
+
     def poser_question_id(self, question: str, session_id: str = None, username: str = None, email: str = None) -> str:
         """
         Pose une question en tenant compte des autorisations de l'utilisateur.
@@ -572,121 +936,343 @@ class ChatbotMarocV2Simplified:
         :raises Exception: Peut lever une exception en cas d'erreur dans le traitement
             ou la sauvegarde des données de conversation.
         """
-        start_time = time.time()
+        return _executer_coroutine(self.poser_question_with_permissions_async(
+            question, session_id, user_permissions, username, email))
+
+    async def poser_question_with_permissions_async(self, question: str, session_id: str = None,
+                                                    user_permissions: List[str] = None, username: str = None,
+                                                    email: str = None) -> str:
+        """
+        Version asynchrone de :meth:`poser_question_with_permissions` : le graphe est
+        exécuté via ``graph.ainvoke``, sans bloquer la boucle d'événements de l'appelant
+        pendant les appels RAG et Gemini des agents.
+
+        :param question: La question posée par l'utilisateur.
+        :type question: str
+        :param session_id: Identifiant de session pour suivre l'interaction.
+        :type session_id: str, facultatif
+        :param user_permissions: Permissions à utiliser, par défaut celles de l'instance.
+        :type user_permissions: List[str], facultatif
+        :param username: Nom d'utilisateur pour la sauvegarde de l'historique.
+        :type username: str, facultatif
+        :param email: Adresse e-mail pour la sauvegarde de l'historique.
+        :type email: str, facultatif
+        :return: Une réponse enrichie basée sur la question et le contexte utilisateur.
+        :rtype: str
+        """
         active_permissions = user_permissions or self.user_permissions
 
-        # Validation existante
-        if not question.strip():
-            return "Veuillez poser une question valide."
+        # Validation : questions vides, trop courtes ou couvertes par la FAQ
+        reponse_immediate = _reponse_immediate(question)
+        if reponse_immediate is not None:
+            return reponse_immediate
 
-        print(f"Question reçue pour {self.user_role}: '{question[:50]}...'", file=sys.stderr)
+        self.logger.info(f"Question reçue pour {self.user_role}: '{question[:50]}...'")
 
-        # État initial COMPLET avec tous les champs nécessaires
-        etat_initial = ChatbotState(
-            # Champs de base
-            question_utilisateur=question.strip(),
-            session_id=session_id,
-            user_role=self.user_role,
-            user_permissions=active_permissions,
-            username=username,
-            email=email,
-            historique=[],
-
-            # Champs RAG
-            documents_trouves=[],
-            tableaux_pertinents=[],
-            pdfs_pertinents=[],
-
-            # Champs chargement
-            tableaux_charges=[],
-            pdfs_charges=[],
-            tableaux_reference=[],
-
-            # Champs sélection
-            tableaux_pour_upload=[],
-            pdfs_pour_upload=[],
-            explication_selection=None,
-
-            # Champs analyse Excel
-            dataframes=[],
-            reponse_analyseur_brute=None,
-            besoin_calculs=False,
-            instruction_calcul=None,
-            algo_genere=None,
-            excel_empty="",
-
-            # Champs calculs
-            code_pandas=None,
-            resultat_pandas=None,
-            erreur_pandas=None,
-            fichiers_gemini=[],
-            fichiers_csvs_local=[],
-            tableau_pour_calcul=None,
-
-            # Champs analyse PDF
-            reponse_analyseur_texte_brut=None,
-            reponse_finale_pdf="",
-            sources_pdf=[],
-
-            # Champs compatibilité
-            documents_selectionnes=[],
-            pdfs_pour_contexte=[],
-            documents_excel=[],
-            documents_pdf=[],
-
-            # Résultat final
-            reponse_finale="",
-
-            processing_mode=""
-        )
+        with self.perf_logger.time_request(question) as mesure:
+            try:
+                etat_initial = self._preparer_etat_initial(question, session_id, active_permissions,
+                                                           username, email)
+                contexte_cache = self._contexte_cache(user_permissions, username, email)
 
-        try:
-            # Log initial avec permissions
-            self._log_with_permissions(f"Démarrage analyse avec niveau d'accès {self.user_role}", etat_initial)
-
-            # WORKFLOW SIMPLIFIÉ
-            etat_final = self.graph.invoke(etat_initial)
-
-            # Logs de succès
-            duration = time.time() - start_time
-            self.perf_logger.log_request_metrics(question, duration, True)
-
-            # Enrichir la réponse finale avec info de permissions
-            reponse_base = etat_final.get('reponse_finale', "Aucune réponse générée.")
-            reponse_enrichie = self._enrichir_reponse_avec_permissions(reponse_base, etat_final)
-
-            # SAUVEGARDE AUTOMATIQUE DANS L'HISTORIQUE
-            if username and email:
-                try:
-                    success = conversation_memory.save_conversation(
-                        username=username,
-                        email=email,
-                        question=question.strip(),
-                        reponse=reponse_enrichie,
-                        session_id=session_id
-                    )
-                    if success:
-                        self._log(f"Conversation sauvegardée pour {username}", etat_final)
-                        stats = conversation_memory.get_conversation_stats(username, email)
-                        self._log(f"Stats: {stats['total_conversations']} total, {stats['conversations_24h']} récentes",
-                                  etat_final)
-                    else:
-                        self._log("Erreur sauvegarde conversation", etat_final)
-                except Exception as e:
-                    self._log_error(f"Erreur sauvegarde historique: {e}", etat_final)
-            else:
-                self._log("Username/email manquants, pas de sauvegarde historique", etat_final)
+                # Court-circuit : question déjà traitée récemment pour le même niveau d'accès
+                reponse_cache = await self._reponse_depuis_cache(question, contexte_cache, etat_initial,
+                                                                 session_id, username, email)
+                if reponse_cache is not None:
+                    return reponse_cache
 
-            return reponse_enrichie
+                # WORKFLOW SIMPLIFIÉ
+                etat_final = await self.graph.ainvoke(etat_initial, config={"configurable": {"chatbot": self}})
 
-        except Exception as e:
-            # Gestion d'erreur
-            duration = time.time() - start_time
-            error_msg = f"Erreur système: {str(e)}"
-            self.perf_logger.log_request_metrics(question, duration, False, error_msg)
+                return await self._finaliser_reponse(question, contexte_cache, etat_final,
+                                                     session_id, username, email)
+
+            except Exception as e:
+                return self._reponse_erreur(question, e, mesure)
+
+    async def poser_questions_batch_async(self, questions: List[str], session_id: str = None,
+                                          user_permissions: List[str] = None, username: str = None,
+                                          email: str = None) -> List[str]:
+        """
+        Traite plusieurs questions en parallèle : chaque question passe par
+        :meth:`poser_question_with_permissions_async` et les coroutines sont lancées
+        ensemble via ``asyncio.gather``. La latence totale tend ainsi vers celle de la
+        question la plus lente plutôt que vers la somme des latences.
+
+        Chaque question suit donc le même traitement qu'une question isolée (validation,
+        cache, enrichissement, sauvegarde de l'historique) avec son propre chronomètre ;
+        une erreur sur une question n'interrompt pas les autres.
+
+        :param questions: Liste des questions à traiter.
+        :type questions: List[str]
+        :param session_id: Identifiant de session pour suivre l'interaction.
+        :type session_id: str, facultatif
+        :param user_permissions: Permissions à utiliser, par défaut celles de l'instance.
+        :type user_permissions: List[str], facultatif
+        :param username: Nom d'utilisateur pour la sauvegarde de l'historique.
+        :type username: str, facultatif
+        :param email: Adresse e-mail pour la sauvegarde de l'historique.
+        :type email: str, facultatif
+        :return: Les réponses enrichies, dans l'ordre des questions.
+        :rtype: List[str]
+        """
+        return list(await asyncio.gather(*(
+            self.poser_question_with_permissions_async(question, session_id, user_permissions, username, email)
+            for question in questions
+        )))
+
+    def poser_questions_batch(self, questions: List[str], session_id: str = None,
+                              user_permissions: List[str] = None, username: str = None,
+                              email: str = None) -> List[str]:
+        """
+        Version synchrone de :meth:`poser_questions_batch_async`.
+
+        :param questions: Liste des questions à traiter.
+        :type questions: List[str]
+        :return: Les réponses enrichies, dans l'ordre des questions.
+        :rtype: List[str]
+        """
+        return _executer_coroutine(self.poser_questions_batch_async(questions, session_id, user_permissions,
+                                                                    username, email))
+
+    async def stream_question(self, question: str, session_id: str = None, user_permissions: List[str] = None,
+                              username: str = None, email: str = None) -> AsyncIterator[Dict[str, str]]:
+        """
+        Variante en streaming de :meth:`poser_question_with_permissions` : le texte de
+        la synthèse est transmis morceau par morceau dès sa génération par Gemini, au
+        lieu d'attendre la fin du graphe.
+
+        Les éléments produits sont des dictionnaires ``{"type": ..., "content": ...}`` :
+        ``"token"`` pour un morceau de synthèse, puis un unique ``"final"`` contenant la
+        réponse enrichie complète (ou ``"error"`` en cas d'échec).
+
+        :param question: La question posée par l'utilisateur.
+        :type question: str
+        :param session_id: Identifiant de session pour suivre l'interaction.
+        :type session_id: str, facultatif
+        :param user_permissions: Permissions à utiliser, par défaut celles de l'instance.
+        :type user_permissions: List[str], facultatif
+        :param username: Nom d'utilisateur pour la sauvegarde de l'historique.
+        :type username: str, facultatif
+        :param email: Adresse e-mail pour la sauvegarde de l'historique.
+        :type email: str, facultatif
+        :return: Un itérateur asynchrone sur les morceaux de réponse.
+        :rtype: AsyncIterator[Dict[str, str]]
+        """
+        active_permissions = user_permissions or self.user_permissions
+
+        reponse_immediate = _reponse_immediate(question)
+        if reponse_immediate is not None:
+            yield {"type": "final", "content": reponse_immediate}
+            return
+
+        with self.perf_logger.time_request(question) as mesure:
+            etat_initial = self._preparer_etat_initial(question, session_id, active_permissions, username, email)
+            contexte_cache = self._contexte_cache(user_permissions, username, email)
+
+            try:
+                reponse_cache = await self._reponse_depuis_cache(question, contexte_cache, etat_initial,
+                                                                 session_id, username, email)
+                if reponse_cache is not None:
+                    yield {"type": "final", "content": reponse_cache}
+                    return
+
+                etat_final = etat_initial
+                async for mode, donnees in self.graph.astream(etat_initial,
+                                                              config={"configurable": {"chatbot": self}},
+                                                              stream_mode=["custom", "values"]):
+                    if mode == "custom" and "synthese" in donnees:
+                        yield {"type": "token", "content": donnees["synthese"]}
+                    elif mode == "values":
+                        etat_final = donnees
+
+                reponse_enrichie = await self._finaliser_reponse(question, contexte_cache, etat_final,
+                                                                 session_id, username, email)
+                yield {"type": "final", "content": reponse_enrichie}
+
+            except Exception as e:
+                yield {"type": "error", "content": self._reponse_erreur(question, e, mesure)}
+
+    def _preparer_etat_initial(self, question: str, session_id: str, active_permissions: List[str],
+                               username: str, email: str) -> ChatbotState:
+        """
+        Construit l'état initial d'une requête à partir du gabarit et journalise le
+        démarrage de l'analyse.
+
+        :param question: Question posée par l'utilisateur.
+        :type question: str
+        :param session_id: Identifiant de session.
+        :type session_id: str
+        :param active_permissions: Permissions effectives de la requête.
+        :type active_permissions: List[str]
+        :param username: Nom d'utilisateur.
+        :type username: str
+        :param email: Adresse e-mail de l'utilisateur.
+        :type email: str
+        :return: L'état initial prêt à être passé au graphe.
+        :rtype: ChatbotState
+        """
+        # État initial COMPLET : gabarit + champs propres à la requête, construit en
+        # une seule passe (pas de copie suivie d'un update qui re-hache ces clés)
+        etat_initial: ChatbotState = {
+            **_EMPTY_STATE_TEMPLATE,
+            "question_utilisateur": question.strip(),
+            "session_id": session_id,
+            "user_role": self.user_role,
+            "user_permissions": active_permissions,
+            "username": username,
+            "email": email,
+            "historique": [],
+        }
+
+        # Log initial avec permissions
+        self._log_with_permissions(f"Démarrage analyse avec niveau d'accès {self.user_role}", etat_initial)
+        return etat_initial
+
+    def _contexte_cache(self, user_permissions: List[str] = None, username: str = None,
+                        email: str = None) -> tuple:
+        """
+        Construit la partie « contexte » de la clé du cache des réponses : rôle,
+        permissions triées (pour que leur ordre n'empêche pas un hit) et identité de
+        l'utilisateur. L'identité est nécessaire car le prompt de synthèse inclut
+        l'historique de l'utilisateur : une réponse ne doit pas être servie à un autre.
+
+        :param user_permissions: Permissions passées à la requête, ``None`` (ou vide)
+            pour utiliser celles de l'instance.
+        :type user_permissions: List[str]
+        :param username: Nom d'utilisateur de la requête.
+        :type username: str
+        :param email: Adresse e-mail de l'utilisateur.
+        :type email: str
+        :return: Tuple hachable ``(rôle, permissions triées, username, email)``.
+        :rtype: tuple
+        """
+        permissions = tuple(sorted(user_permissions)) if user_permissions else self._permissions_defaut
+        return self.user_role, permissions, username, email
+
+    async def _reponse_depuis_cache(self, question: str, contexte_cache: tuple, etat_initial: ChatbotState,
+                                    session_id: str, username: str, email: str):
+        """
+        Cherche la question dans le cache des réponses. En cas de hit, planifie la
+        sauvegarde de l'historique comme pour une réponse calculée. La recherche
+        (encodage de la question pour le niveau sémantique) s'exécute dans un thread,
+        hors de la boucle d'événements partagée avec les autres requêtes.
+
+        :return: La réponse en cache, ou ``None`` si le graphe doit être exécuté.
+        :rtype: Optional[str]
+        """
+        reponse_cache = await asyncio.to_thread(self._answer_cache.get, question, contexte_cache)
+        if reponse_cache is not None:
+            self._log("Réponse servie depuis le cache", etat_initial)
+            self._bg_executor.submit(self._persist_conversation, username, email, question.strip(),
+                                     reponse_cache, session_id, etat_initial)
+        return reponse_cache
+
+    async def _finaliser_reponse(self, question: str, contexte_cache: tuple, etat_final: ChatbotState,
+                                 session_id: str, username: str, email: str) -> str:
+        """
+        Post-traitement commun après exécution du graphe : enrichissement de la
+        réponse avec les permissions, mise en cache (synthèse réussie uniquement, avec
+        encodage dans un thread comme pour la recherche) et sauvegarde de l'historique.
+
+        :return: La réponse enrichie renvoyée à l'utilisateur.
+        :rtype: str
+        """
+        # Enrichir la réponse finale avec info de permissions
+        reponse_base = etat_final.get('reponse_finale', "Aucune réponse générée.")
+        reponse_enrichie = self._enrichir_reponse_avec_permissions(reponse_base, etat_final)
+
+        # Les réponses de repli (erreur, fallback, réponse vide) ne sont pas mises en cache
+        if etat_final.get('synthese_reussie'):
+            await asyncio.to_thread(self._answer_cache.set, question, contexte_cache, reponse_enrichie)
+
+        # SAUVEGARDE AUTOMATIQUE DANS L'HISTORIQUE (en arrière-plan)
+        self._bg_executor.submit(self._persist_conversation, username, email, question.strip(),
+                                 reponse_enrichie, session_id, etat_final)
+
+        return reponse_enrichie
+
+    def _reponse_erreur(self, question: str, erreur: BaseException, mesure: RequestTimer) -> str:
+        """
+        Marque la requête comme échouée dans son chronomètre, journalise l'erreur et
+        construit le message d'erreur renvoyé à l'utilisateur.
+
+        :return: Le message d'erreur destiné à l'utilisateur.
+        :rtype: str
+        """
+        # Gestion d'erreur
+        error_msg = f"Erreur système: {str(erreur)}"
+        mesure.echec(error_msg)
+
+        self.logger.error(f"Erreur critique pour {self.user_role}: {error_msg}")
+        return f"ERREUR: {error_msg}. Votre niveau d'accès: {self._role_upper}. Veuillez réessayer."
+
+    def _persist_conversation(self, username: str, email: str, question: str, reponse: str,
+                              session_id: str, state: ChatbotState):
+        """
+        Sauvegarde la conversation dans l'historique SQLite de l'utilisateur et
+        journalise les statistiques associées. Aucune sauvegarde n'est effectuée si
+        le nom d'utilisateur ou l'email est absent. Exécutée sur ``_bg_executor`` :
+        toutes les exceptions sont capturées ici.
+
+        :param username: Nom d'utilisateur associé à la conversation.
+        :type username: str
+        :param email: Adresse email de l'utilisateur.
+        :type email: str
+        :param question: Question posée par l'utilisateur.
+        :type question: str
+        :param reponse: Réponse enrichie renvoyée à l'utilisateur.
+        :type reponse: str
+        :param session_id: Identifiant de session associé.
+        :type session_id: str
+        :param state: État du chatbot dans lequel journaliser la sauvegarde.
+        :type state: ChatbotState
+        """
+        if username and email:
+            try:
+                conversation_memory = get_conversation_memory()
+                success = conversation_memory.save_conversation(
+                    username=username,
+                    email=email,
+                    question=question,
+                    reponse=reponse,
+                    session_id=session_id
+                )
+                if success:
+                    self._log(f"Conversation sauvegardée pour {username}", state)
+                    stats = conversation_memory.get_conversation_stats(username, email)
+                    self._log(f"Stats: {stats['total_conversations']} total, {stats['conversations_24h']} récentes",
+                              state)
+                else:
+                    self._log("Erreur sauvegarde conversation", state)
+            except Exception as e:
+                self._log_error(f"Erreur sauvegarde historique: {e}", state)
+        else:
+            self._log("Username/email manquants, pas de sauvegarde historique", state)
 
-            self.logger.error(f"Erreur critique pour {self.user_role}: {error_msg}")
-            return f"ERREUR: {error_msg}. Votre niveau d'accès: {self.user_role.upper()}. Veuillez réessayer."
+    def close(self):
+        """
+        Attend la fin des sauvegardes d'historique en cours puis libère l'exécuteur
+        d'arrière-plan. À appeler avant la fin du processus.
+        """
+        self._bg_executor.shutdown(wait=True)
+
+    def supprimer_historique_utilisateur(self, username: str, email: str) -> int:
+        """
+        Supprime l'historique d'un utilisateur puis retire du cache ses réponses : leur
+        prompt de synthèse incluait cet historique, elles ne doivent plus être servies.
+
+        :param username: Nom d'utilisateur dont l'historique est supprimé.
+        :type username: str
+        :param email: Adresse e-mail de l'utilisateur.
+        :type email: str
+        :return: Le nombre de conversations supprimées.
+        :rtype: int
+        """
+        supprimees = get_conversation_memory().delete_user_conversations(username, email)
+        # Contexte du cache : (rôle, permissions, username, email), voir _contexte_cache
+        self._answer_cache.invalider(lambda contexte: contexte[2:] == (username, email))
+        return supprimees
 
     def _enrichir_reponse_avec_permissions(self, reponse_base: str, etat_final: ChatbotState) -> str:
         """
@@ -708,59 +1294,53 @@ class ChatbotMarocV2Simplified:
         :rtype: str
         """
 
-        # Indicateurs visuels par rôle
-        role_indicators = {
-            'public': '**Accès Public**',
-            'employee': '**Accès Employé**',
-            'admin': '**Accès Administrateur**'
-        }
-
-        indicator = role_indicators.get(self.user_role, '**Accès Limité**')
+        # Indicateur visuel du rôle (résolu à l'initialisation)
+        indicator = self._role_hdr
 
         # Compter les documents utilisés par niveau d'accès
         tableaux_utilises = etat_final.get('tableaux_charges', [])
         pdfs_utilises = etat_final.get('pdfs_charges', [])
 
-        stats_acces = {'public': 0, 'internal': 0, 'confidential': 0}
+        # Un seul passage sur Excel + PDFs ; le décompte lui-même (Counter sur un
+        # itérable filtré) s'exécute en C, sans boucle Python explicite
+        stats_acces = Counter()
+        if tableaux_utilises or pdfs_utilises:
+            niveaux = (doc.get('access_level', 'public') for doc in chain(tableaux_utilises, pdfs_utilises)
+                       if isinstance(doc, dict))
+            stats_acces.update(filter(_NIVEAUX_ACCES.__contains__, niveaux))
 
-        # Compter Excel
-        for tableau in tableaux_utilises:
-            if isinstance(tableau, dict):
-                access_level = tableau.get('access_level', 'public')
-                if access_level in stats_acces:
-                    stats_acces[access_level] += 1
+        # Construction de la réponse enrichie (morceaux assemblés en une seule fois)
+        parts = [indicator, "\n\n", reponse_base]
 
-        # Compter PDFs
-        for pdf in pdfs_utilises:
-            if isinstance(pdf, dict):
-                access_level = pdf.get('access_level', 'public')
-                if access_level in stats_acces:
-                    stats_acces[access_level] += 1
+        # Ajouter les stats d'accès si des documents ont été utilisés
+        if stats_acces:
+            parts.append("\n\n**Sources consultées :**\n")
+            for niveau, libelle in _LIBELLES_SOURCES:
+                nb_docs = stats_acces[niveau]
+                if nb_docs > 0:
+                    parts.append(libelle.format(nb_docs))
 
-        # Construction de la réponse enrichie
-        reponse_enrichie = f"{indicator}\n\n{reponse_base}"
+        # Info debug pour les admins (vide pour les autres rôles)
+        parts.append(self._debug_admin)
 
-        # Ajouter les stats d'accès si des documents ont été utilisés
-        total_docs = sum(stats_acces.values())
-        if total_docs > 0:
-            reponse_enrichie += f"\n\n**Sources consultées :**\n"
-            if stats_acces['public'] > 0:
-                reponse_enrichie += f"- [PUBLIC] {stats_acces['public']} document(s) public(s)\n"
-            if stats_acces['internal'] > 0:
-                reponse_enrichie += f"- [INTERNE] {stats_acces['internal']} document(s) interne(s)\n"
-            if stats_acces['confidential'] > 0:
-                reponse_enrichie += f"- [CONFIDENTIEL] {stats_acces['confidential']} document(s) confidentiel(s)\n"
-
-        # Info debug pour les admins
-        if self.user_role == 'admin':
-            permissions_safe = self.user_permissions or ["unknown_permissions"]
-            if isinstance(permissions_safe, list):
-                permissions_str = ', '.join(permissions_safe)
-            else:
-                permissions_str = str(permissions_safe)
-            reponse_enrichie += f"\n**Debug Admin :** Permissions actives: {permissions_str}"
+        return "".join(parts)
 
-        return reponse_enrichie
+    def _construire_debug_admin(self) -> str:
+        """
+        Construit, une fois à l'initialisation, la ligne de debug ajoutée aux réponses
+        des administrateurs.
+
+        :return: La ligne de debug, ou une chaîne vide si l'utilisateur n'est pas admin.
+        :rtype: str
+        """
+        if self.user_role != 'admin':
+            return ""
+        permissions_safe = self.user_permissions or ["unknown_permissions"]
+        if isinstance(permissions_safe, list):
+            permissions_str = ', '.join(permissions_safe)
+        else:
+            permissions_str = str(permissions_safe)
+        return f"\n**Debug Admin :** Permissions actives: {permissions_str}"
 
     def get_user_conversation_history(self, username: str, email: str, limit: int = 10) -> dict:
         """
@@ -786,6 +1366,7 @@ class ChatbotMarocV2Simplified:
         :rtype: dict
         """
         try:
+            conversation_memory = get_conversation_memory()
             history = conversation_memory.get_user_history_24h(username, email, limit)
             stats = conversation_memory.get_conversation_stats(username, email)
             context = conversation_memory.format_history_for_context(username, email, limit // 2)
@@ -1,12 +1,204 @@
+import atexit
 import sqlite3
 import os
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import logging
 from contextlib import contextmanager
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# PRAGMAs propres à chaque connexion (non persistés dans le fichier)
+_PRAGMAS_CONNEXION = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    # Lectures servies par projection mémoire du fichier (256 Mo max) plutôt que par read()
+    "PRAGMA mmap_size=268435456",
+)
+
+# Requêtes SQL du store, définies une seule fois : le texte envoyé à SQLite est
+# identique d'un appel à l'autre et retombe toujours sur la requête déjà préparée
+# dans le cache de la connexion (voir ``cached_statements``).
+_SQL_INSERT_CONV = """
+    INSERT INTO conversations (username, email, question, reponse, timestamp, session_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_HISTORY_24H = """
+    SELECT question, reponse, timestamp, session_id
+    FROM conversations
+    WHERE username = ? AND email = ? AND timestamp >= ?
+    ORDER BY timestamp DESC, id DESC
+    LIMIT ?
+"""
+
+# Variante pour le contexte des agents : la réponse est tronquée côté SQLite, seuls
+# les 200 premiers caractères traversent la frontière SQLite/Python
+_SQL_HISTORY_CONTEXTE = """
+    SELECT question, substr(reponse, 1, 200), length(reponse) > 200, timestamp
+    FROM conversations
+    WHERE username = ? AND email = ? AND timestamp >= ?
+    ORDER BY timestamp DESC, id DESC
+    LIMIT ?
+"""
+
+# Statistiques d'un utilisateur en un seul aller-retour ; la sous-requête de la dernière
+# question ne lit qu'une entrée de idx_user_timestamp (et la ligne correspondante)
+_SQL_STATS = """
+    SELECT COUNT(*) as total,
+           COUNT(CASE WHEN timestamp >= ? THEN 1 END) as recent,
+           MAX(timestamp) as last_timestamp,
+           (SELECT question
+            FROM conversations
+            WHERE username = ? AND email = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT 1) as last_question
+    FROM conversations
+    WHERE username = ? AND email = ?
+"""
+
+# Suppression par paquets : le verrou d'écriture est relâché entre deux paquets
+_SQL_CLEANUP = """
+    DELETE FROM conversations
+    WHERE rowid IN (SELECT rowid FROM conversations WHERE timestamp < ? LIMIT ?)
+"""
+
+_SQL_ALL_USERS = """
+    SELECT DISTINCT username, email
+    FROM conversations
+    ORDER BY username
+"""
+
+_SQL_DELETE_USER = "DELETE FROM conversations WHERE username = ? AND email = ?"
+
+# Colonnes listées explicitement : une colonne ajoutée plus tard n'est pas exportée par mégarde
+_COLONNES_EXPORT = ('id', 'username', 'email', 'question', 'reponse', 'timestamp', 'session_id', 'created_at')
+
+_SQL_EXPORT_USER = f"""
+    SELECT {', '.join(_COLONNES_EXPORT)}
+    FROM conversations
+    WHERE username = ? AND email = ?
+    ORDER BY timestamp DESC, id DESC
+"""
+
+# Conversation complète (réponse non tronquée) retrouvée par sa clé primaire
+_SQL_CONVERSATION_BY_ID = f"SELECT {', '.join(_COLONNES_EXPORT)} FROM conversations WHERE id = ?"
+
+_SQL_HEALTH_TOTAL = "SELECT COUNT(*) as total FROM conversations"
+# Le GROUP BY parcourt idx_user_timestamp (username, email en tête) sans relire la table
+_SQL_HEALTH_USERS = "SELECT COUNT(*) as users FROM (SELECT 1 FROM conversations GROUP BY username, email)"
+_SQL_HEALTH_RECENT = "SELECT COUNT(*) as recent FROM conversations WHERE timestamp >= ?"
+
+# Durée (secondes) pendant laquelle le nombre d'utilisateurs uniques du diagnostic est réutilisé
+_TTL_UTILISATEURS_UNIQUES = 60.0
+
+# Cache du contexte d'historique : durée de validité (secondes) et nombre maximum d'utilisateurs
+_TTL_CONTEXTE = 5.0
+_TAILLE_MAX_CACHE_CONTEXTE = 1024
+
+# Nombre maximum de lignes supprimées par transaction dans cleanup_old_conversations
+_TAILLE_LOT_NETTOYAGE = 1000
+
+# Nombre de lignes supprimées par un nettoyage au-delà duquel les statistiques sont recalculées
+_SEUIL_ANALYZE_NETTOYAGE = 1000
+
+# Nombre maximum de lignes par transaction dans save_conversations_bulk
+_TAILLE_LOT_INSERTION = 500
+
+# Version du schéma, suivie via PRAGMA user_version
+# 1 : colonne timestamp stockée en entier (secondes epoch) au lieu de texte DATETIME
+# 2 : index plein texte conversations_fts (FTS5) alimenté par triggers
+_SCHEMA_VERSION = 2
+
+# Migration des horodatages texte (heure locale, format datetime Python) vers l'epoch
+_SQL_MIGRATION_EPOCH = """
+    UPDATE conversations
+    SET timestamp = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+    WHERE typeof(timestamp) = 'text'
+"""
+
+# Recherche plein texte (FTS5) sur question/reponse, table à contenu externe synchronisée
+# par triggers ; remove_diacritics 2 : "fes" trouve "Fès"
+_SQL_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+        question, reponse,
+        content='conversations', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+_SQL_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_ai AFTER INSERT ON conversations BEGIN
+        INSERT INTO conversations_fts(rowid, question, reponse) VALUES (new.id, new.question, new.reponse);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_ad AFTER DELETE ON conversations BEGIN
+        INSERT INTO conversations_fts(conversations_fts, rowid, question, reponse)
+        VALUES ('delete', old.id, old.question, old.reponse);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_au AFTER UPDATE OF question, reponse ON conversations BEGIN
+        INSERT INTO conversations_fts(conversations_fts, rowid, question, reponse)
+        VALUES ('delete', old.id, old.question, old.reponse);
+        INSERT INTO conversations_fts(rowid, question, reponse) VALUES (new.id, new.question, new.reponse);
+    END
+    """,
+)
+
+_SQL_FTS_REBUILD = "INSERT INTO conversations_fts(conversations_fts) VALUES ('rebuild')"
+
+_SQL_SEARCH_USER = """
+    SELECT c.question, c.reponse, c.timestamp, c.session_id
+    FROM conversations_fts
+    JOIN conversations c ON c.id = conversations_fts.rowid
+    WHERE conversations_fts MATCH ? AND c.username = ? AND c.email = ?
+    ORDER BY conversations_fts.rank
+    LIMIT ?
+"""
+
+# Contexte renvoyé aux agents pour un utilisateur sans conversation dans les 24h
+_CONTEXTE_SANS_HISTORIQUE = "HISTORIQUE: Aucune conversation précédente dans les 24h.\n"
+
+# Séparateurs du contexte d'historique transmis aux agents
+_SEPARATEUR_CONTEXTE = "=" * 60 + "\n"
+_SEPARATEUR_CONVERSATION = "-" * 40 + "\n"
+
+
+# Fenêtre de l'historique récent (historique, statistiques, diagnostic)
+_FENETRE_24H = timedelta(hours=24)
+
+
+def _maintenant_epoch() -> int:
+    """Horodatage courant en secondes epoch, format de stockage de la colonne timestamp."""
+    return int(time.time())
+
+
+def _epoch_avant(delai: timedelta) -> int:
+    """
+    Horodatage epoch de l'instant situé ``delai`` avant maintenant (borne des requêtes).
+    Calculé sur l'epoch plutôt qu'en heure locale naïve : pas d'objets datetime intermédiaires,
+    et une fenêtre de 24h reste de 24h lors d'un changement d'heure.
+    """
+    return int(time.time() - delai.total_seconds())
+
+
+def _depuis_epoch(epoch: Optional[int]) -> Optional[str]:
+    """
+    Convertit un horodatage epoch stocké en base vers le texte renvoyé par l'API
+    (``AAAA-MM-JJ HH:MM:SS``, heure locale), comme avant le passage en entiers.
+    """
+    return None if epoch is None else str(datetime.fromtimestamp(epoch))
+
 
 class ConversationMemoryStore:
     """
@@ -19,16 +211,38 @@ class ConversationMemoryStore:
 
     :ivar db_path: Chemin vers la base de données SQLite utilisée pour stocker les conversations.
     :type db_path: str
+    :ivar pool_size: Nombre maximum de connexions SQLite gardées ouvertes et réutilisées.
+    :type pool_size: int
     """
 
-    def __init__(self, db_path: str = "conversations.db"):
+    def __init__(self, db_path: str = "conversations.db", pool_size: Optional[int] = None):
         """
         Initialise le store SQLite
 
         Args:
             db_path: Chemin vers la base de données SQLite
+            pool_size: Taille du pool de connexions (par défaut max(4, nombre de CPU))
         """
         self.db_path = db_path
+        # Une base ":memory:" est propre à sa connexion : une seule connexion partagée
+        if db_path == ":memory:":
+            pool_size = 1
+        self.pool_size = pool_size or max(4, os.cpu_count() or 1)
+        self._pool = queue.LifoQueue(maxsize=self.pool_size)
+        self._pool_lock = threading.Lock()
+        self._connexions_ouvertes = 0
+        # (expiration monotonic, valeur) du nombre d'utilisateurs uniques pour check_database_health
+        self._cache_utilisateurs: Optional[Tuple[float, int]] = None
+        # Contexte d'historique déjà formaté : (username, email) -> {max_conversations: (horodatage, texte)}
+        self._ctx_cache: Dict[Tuple[str, str], Dict[int, Tuple[float, str]]] = {}
+        # Utilisateurs connus sans historique 24h (cas le plus fréquent : nouveaux utilisateurs),
+        # avec l'horodatage monotonic de la lecture. Même TTL que _ctx_cache : un autre processus
+        # partageant la base peut enregistrer une conversation sans invalider ce cache.
+        # Protégé par _ctx_lock.
+        self._sans_historique: Dict[Tuple[str, str], float] = {}
+        self._ctx_lock = threading.Lock()
+        # Faux si SQLite a été compilé sans FTS5 : search_user_conversations renvoie alors []
+        self._fts_disponible = False
         self._init_database()
         logger.info(f" ConversationMemoryStore initialisé: {os.path.abspath(db_path)}")
 
@@ -45,6 +259,11 @@ class ConversationMemoryStore:
         """
         try:
             with self._get_connection() as conn:
+                # WAL : les lectures (historique, stats) ne sont plus bloquées par les écritures.
+                # Le mode est persistant dans le fichier, inutile de le redemander à chaque connexion.
+                if self.db_path != ":memory:":
+                    conn.execute("PRAGMA journal_mode=WAL")
+
                 conn.execute("""
                              CREATE TABLE IF NOT EXISTS conversations
                              (
@@ -70,7 +289,7 @@ class ConversationMemoryStore:
                                  NOT
                                  NULL,
                                  timestamp
-                                 DATETIME
+                                 INTEGER
                                  NOT
                                  NULL,
                                  session_id
@@ -82,16 +301,31 @@ class ConversationMemoryStore:
                              )
                              """)
 
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+                # Bases créées avant le passage des horodatages en entiers epoch
+                if version < 1:
+                    migrees = conn.execute(_SQL_MIGRATION_EPOCH).rowcount
+                    conn.execute("PRAGMA user_version = 1")
+                    if migrees:
+                        logger.info(f" Migration: {migrees} horodatages convertis en epoch")
+
+                self._fts_disponible = self._init_recherche_plein_texte(conn, version)
+
                 # Index pour optimiser les requêtes fréquentes
                 conn.execute("""
                              CREATE INDEX IF NOT EXISTS idx_user_timestamp
                                  ON conversations(username, email, timestamp DESC)
                              """)
 
-                conn.execute("""
-                             CREATE INDEX IF NOT EXISTS idx_session
-                                 ON conversations(session_id)
-                             """)
+                # Aucune requête ne filtre sur session_id seul : l'index ne faisait que
+                # ralentir les écritures et grossir la base
+                conn.execute("DROP INDEX IF EXISTS idx_session")
+
+                # Statistiques du planificateur, calculées une seule fois
+                # pour que SQLite choisisse idx_user_timestamp pour l'historique
+                if not self._statistiques_presentes(conn):
+                    conn.execute("ANALYZE conversations")
 
                 conn.commit()
                 logger.info(" Base de données conversations initialisée")
@@ -100,6 +334,114 @@ class ConversationMemoryStore:
             logger.error(f" Erreur initialisation DB: {e}")
             raise
 
+    @staticmethod
+    def _init_recherche_plein_texte(conn: sqlite3.Connection, version: int) -> bool:
+        """
+        Crée l'index plein texte ``conversations_fts`` et ses triggers de synchronisation,
+        puis l'alimente une fois avec les conversations déjà présentes (bases antérieures
+        à la version 2 du schéma).
+
+        :param conn: Connexion SQLite ouverte.
+        :type conn: sqlite3.Connection
+        :param version: Version du schéma lue avant migration (``PRAGMA user_version``).
+        :type version: int
+        :return: True si FTS5 est disponible et l'index prêt, False sinon.
+        :rtype: bool
+        """
+        try:
+            conn.execute(_SQL_FTS_TABLE)
+        except sqlite3.OperationalError as e:
+            logger.warning(f" Recherche plein texte indisponible (FTS5): {e}")
+            return False
+
+        for trigger in _SQL_FTS_TRIGGERS:
+            conn.execute(trigger)
+        if version < 2:
+            conn.execute(_SQL_FTS_REBUILD)
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        return True
+
+    @staticmethod
+    def _statistiques_presentes(conn: sqlite3.Connection) -> bool:
+        """
+        Indique si ``ANALYZE`` a déjà produit des statistiques pour ``idx_user_timestamp``.
+
+        :param conn: Connexion SQLite ouverte.
+        :type conn: sqlite3.Connection
+        :return: True si ``sqlite_stat1`` contient une entrée pour ``idx_user_timestamp``.
+        :rtype: bool
+        """
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            return False
+        return conn.execute(
+            "SELECT 1 FROM sqlite_stat1 WHERE idx = 'idx_user_timestamp'"
+        ).fetchone() is not None
+
+    def _ouvrir_connexion(self) -> sqlite3.Connection:
+        """
+        Ouvre une nouvelle connexion SQLite configurée (PRAGMAs).
+
+        La connexion est créée avec ``check_same_thread=False`` : elle peut passer d'un
+        thread à l'autre, mais n'est jamais utilisée simultanément puisqu'un seul
+        emprunteur du pool la détient à la fois.
+
+        :return: Une connexion SQLite prête à l'emploi.
+        :rtype: sqlite3.Connection
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False,
+                               cached_statements=256)
+        # Pas de row_factory : les lignes sont des tuples lus par position, plus rapides
+        # que sqlite3.Row et son accès par nom de colonne
+        for pragma in _PRAGMAS_CONNEXION:
+            conn.execute(pragma)
+        return conn
+
+    def _emprunter_connexion(self) -> sqlite3.Connection:
+        """
+        Récupère une connexion libre du pool, en ouvre une nouvelle si le pool n'est pas
+        encore plein, ou attend qu'une connexion soit rendue.
+
+        :return: Une connexion SQLite réservée à l'appelant.
+        :rtype: sqlite3.Connection
+        """
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            ouvrir = self._connexions_ouvertes < self.pool_size
+            if ouvrir:
+                self._connexions_ouvertes += 1
+
+        if not ouvrir:
+            return self._pool.get()
+
+        try:
+            return self._ouvrir_connexion()
+        except Exception:
+            with self._pool_lock:
+                self._connexions_ouvertes -= 1
+            raise
+
+    def _rendre_connexion(self, conn: sqlite3.Connection):
+        """
+        Remet une connexion dans le pool après avoir annulé toute transaction restée ouverte.
+
+        :param conn: Connexion obtenue via ``_emprunter_connexion``.
+        :type conn: sqlite3.Connection
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Connexion inutilisable : on la ferme et on libère sa place dans le pool
+            conn.close()
+            with self._pool_lock:
+                self._connexions_ouvertes -= 1
+            return
+        self._pool.put_nowait(conn)
+
     @contextmanager
     def _get_connection(self):
         """
@@ -107,30 +449,68 @@ class ConversationMemoryStore:
         données SQLite, avec gestion automatisée des transactions et nettoyage en
         cas d'erreur.
 
-        Lorsque le gestionnaire de contexte est utilisé, il établit une connexion avec la
-        base de données, permet son utilisation à l'intérieur du bloc de code, et se charge
-        de fermer la connexion une fois que le bloc de code est terminé ou en cas
-        d'exception.
+        Les connexions sont empruntées à un pool borné plutôt qu'ouvertes et fermées à
+        chaque appel : les PRAGMAs et le cache de requêtes préparées de SQLite restent
+        ainsi chauds d'un tour de conversation à l'autre. La connexion est rendue au
+        pool une fois le bloc de code terminé, y compris en cas d'exception.
 
         :raises Exception: Si une erreur survient pendant l'utilisation de la connexion.
-        :return: Un objet connexion SQLite avec `row_factory` configuré pour permettre
-                 l'accès aux colonnes par nom.
+        :return: Un objet connexion SQLite dont les lignes sont des tuples.
         """
-        conn = None
+        conn = self._emprunter_connexion()
         try:
-            conn = sqlite3.connect(self.db_path, timeout=30.0)
-            conn.row_factory = sqlite3.Row  # Pour accéder aux colonnes par nom
             yield conn
         except Exception as e:
-            if conn:
-                conn.rollback()
+            conn.rollback()
             raise e
         finally:
-            if conn:
-                conn.close()
+            self._rendre_connexion(conn)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Regroupe plusieurs écritures dans une seule transaction (un seul fsync au commit).
+
+        La transaction est ouverte en ``BEGIN IMMEDIATE`` : le verrou d'écriture est pris
+        dès le début, ce qui évite l'échec tardif d'une transaction qui aurait commencé en
+        lecture. Elle est validée à la sortie du bloc, annulée en cas d'exception. Les
+        contextes d'historique en cache sont invalidés après validation, les utilisateurs
+        concernés n'étant pas connus.
+
+        :raises Exception: Si une erreur survient pendant la transaction.
+        :return: La connexion SQLite sur laquelle exécuter les écritures.
+        """
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+
+        with self._ctx_lock:
+            self._ctx_cache.clear()
+            self._sans_historique.clear()
+
+    def close(self):
+        """
+        Ferme les connexions disponibles dans le pool.
+
+        ``PRAGMA optimize`` est exécuté avant chaque fermeture : SQLite y rafraîchit les
+        statistiques du planificateur pour les index que la connexion a utilisés, si besoin.
+        """
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.warning(f" PRAGMA optimize ignoré: {e}")
+            conn.close()
+            with self._pool_lock:
+                self._connexions_ouvertes -= 1
 
     def save_conversation(self, username: str, email: str, question: str,
-                          reponse: str, session_id: str = None) -> bool:
+                          reponse: str, session_id: str = None) -> Optional[Dict]:
         """
         Enregistre une conversation dans la base de données. La fonction enregistre
         les informations fournies, telles que le nom d'utilisateur, l'adresse email,
@@ -147,32 +527,69 @@ class ConversationMemoryStore:
         :type reponse: str
         :param session_id: L'identifiant de session associé, optionnel
         :type session_id: str, optional
-        :return: Retourne True si la conversation a été enregistrée avec succès,
-                 False en cas d'échec
-        :rtype: bool
+        :return: En cas de succès, un dictionnaire avec l'identifiant ('id') et le 'timestamp'
+                 de la conversation enregistrée (évaluable comme vrai) ; None en cas d'échec
+        :rtype: Optional[Dict]
         """
         try:
+            horodatage = _maintenant_epoch()
             with self._get_connection() as conn:
-                conn.execute("""
-                             INSERT INTO conversations
-                                 (username, email, question, reponse, timestamp, session_id)
-                             VALUES (?, ?, ?, ?, ?, ?)
-                             """, (
-                                 username,
-                                 email,
-                                 question,
-                                 reponse,
-                                 datetime.now(),
-                                 session_id
-                             ))
+                cursor = conn.execute(_SQL_INSERT_CONV, (
+                    username,
+                    email,
+                    question,
+                    reponse,
+                    horodatage,
+                    session_id
+                ))
+                # Identifiant fourni par sqlite3 sans seconde requête
+                conversation_id = cursor.lastrowid
                 conn.commit()
 
-            logger.info(f" Conversation sauvegardée: {username} ({session_id})")
-            return True
+            self._invalider_contexte(username, email)
+            # Appelé à chaque tour : niveau DEBUG, message formaté seulement si ce niveau est actif
+            logger.debug(" Conversation sauvegardée: %s (%s)", username, session_id)
+            return {'id': conversation_id, 'timestamp': _depuis_epoch(horodatage)}
 
         except Exception as e:
             logger.error(f" Erreur sauvegarde conversation: {e}")
-            return False
+            return None
+
+    def save_conversations_bulk(self, conversations: Iterable[Tuple]) -> int:
+        """
+        Enregistre un lot de conversations avec ``executemany``, une transaction par paquet
+        de ``_TAILLE_LOT_INSERTION`` lignes (rejeu de journaux, import en masse...).
+
+        Les paquets sont bornés pour que chaque transaction d'écriture reste courte et ne
+        bloque pas longtemps les autres écrivains ; les lecteurs ne sont pas bloqués en WAL.
+
+        :param conversations: Tuples ``(username, email, question, reponse, session_id)``.
+            Le timestamp est ajouté à l'insertion, comme pour ``save_conversation``.
+        :type conversations: Iterable[Tuple]
+        :return: Le nombre de conversations enregistrées (les paquets déjà validés restent
+            enregistrés si un paquet suivant échoue).
+        :rtype: int
+        """
+        enregistrees = 0
+        try:
+            lignes = iter(conversations)
+            while True:
+                horodatage = _maintenant_epoch()
+                paquet = [(username, email, question, reponse, horodatage, session_id)
+                          for username, email, question, reponse, session_id
+                          in islice(lignes, _TAILLE_LOT_INSERTION)]
+                if not paquet:
+                    break
+                with self.transaction() as conn:
+                    conn.executemany(_SQL_INSERT_CONV, paquet)
+                enregistrees += len(paquet)
+
+            logger.info(f" {enregistrees} conversations sauvegardées en lot")
+            return enregistrees
+
+        except Exception as e:
+            logger.error(f" Erreur sauvegarde en lot: {e}")
+            return enregistrees
 
     def get_user_history_24h(self, username: str, email: str, limit: int = 20) -> List[Dict]:
         """
@@ -192,35 +609,40 @@ class ConversationMemoryStore:
             'reponse', 'timestamp', et 'session_id'.
         """
         try:
-            cutoff_time = datetime.now() - timedelta(hours=24)
+            # Lignes (question, reponse, timestamp, session_id) lues par position
+            conversations = [
+                {'question': q, 'reponse': r, 'timestamp': _depuis_epoch(t), 'session_id': sid}
+                for q, r, t, sid in self._lire_historique_24h(username, email, limit)
+            ]
 
-            with self._get_connection() as conn:
-                cursor = conn.execute("""
-                                      SELECT question, reponse, timestamp, session_id
-                                      FROM conversations
-                                      WHERE username = ?
-                                        AND email = ?
-                                        AND timestamp >= ?
-                                      ORDER BY timestamp DESC
-                                          LIMIT ?
-                                      """, (username, email, cutoff_time, limit))
-
-                conversations = []
-                for row in cursor.fetchall():
-                    conversations.append({
-                        'question': row['question'],
-                        'reponse': row['reponse'],
-                        'timestamp': row['timestamp'],
-                        'session_id': row['session_id']
-                    })
-
-            logger.info(f" Historique récupéré: {len(conversations)} conversations pour {username}")
+            logger.debug(" Historique récupéré: %s conversations pour %s", len(conversations), username)
             return conversations
 
         except Exception as e:
             logger.error(f" Erreur récupération historique: {e}")
             return []
 
+    def _lire_historique_24h(self, username: str, email: str, limit: int,
+                             sql: str = _SQL_HISTORY_24H) -> List[Tuple]:
+        """
+        Lit les conversations des dernières 24 heures d'un utilisateur, horodatages bruts (epoch).
+
+        :param username: Le nom d'utilisateur.
+        :type username: str
+        :param email: L'adresse email de l'utilisateur.
+        :type email: str
+        :param limit: Le nombre maximum de conversations à lire.
+        :type limit: int
+        :param sql: Requête de lecture : ``_SQL_HISTORY_24H`` (question, reponse, timestamp,
+            session_id) ou ``_SQL_HISTORY_CONTEXTE`` (question, extrait, tronquée, timestamp).
+        :type sql: str
+        :return: Les lignes, de la plus récente à la plus ancienne.
+        :rtype: List[Tuple]
+        """
+        cutoff_time = _epoch_avant(_FENETRE_24H)
+        with self._get_connection() as conn:
+            return conn.execute(sql, (username, email, cutoff_time, limit)).fetchall()
+
     def format_history_for_context(self, username: str, email: str, max_conversations: int = 5) -> str:
         """
         Formate l'historique des conversations pour un contexte spécifique en affichant les détails des
@@ -237,32 +659,124 @@ class ConversationMemoryStore:
             un message indiquant l'absence d'historique.
         :rtype: str
         """
-        history = self.get_user_history_24h(username, email, max_conversations)
+        # Le contexte est demandé plusieurs fois par tour (analyse, synthèse) : réutilisation
+        # pendant _TTL_CONTEXTE secondes, invalidé dès qu'une conversation de l'utilisateur est enregistrée
+        cle = (username, email)
+        maintenant = time.monotonic()
+        with self._ctx_lock:
+            vu_vide = self._sans_historique.get(cle)
+            if vu_vide is not None and maintenant - vu_vide < _TTL_CONTEXTE:
+                return _CONTEXTE_SANS_HISTORIQUE
+            entree = self._ctx_cache.get(cle, {}).get(max_conversations)
+        if entree and maintenant - entree[0] < _TTL_CONTEXTE:
+            return entree[1]
+
+        contexte = self._formater_historique(username, email, max_conversations)
+
+        with self._ctx_lock:
+            if cle not in self._ctx_cache and len(self._ctx_cache) >= _TAILLE_MAX_CACHE_CONTEXTE:
+                # Éviction de l'utilisateur le plus anciennement mis en cache
+                del self._ctx_cache[next(iter(self._ctx_cache))]
+            self._ctx_cache.setdefault(cle, {})[max_conversations] = (maintenant, contexte)
+        return contexte
+
+    def _invalider_contexte(self, username: str, email: str):
+        """
+        Retire du cache le contexte d'historique formaté d'un utilisateur.
 
-        if not history:
-            return "HISTORIQUE: Aucune conversation précédente dans les 24h.\n"
+        :param username: Le nom d'utilisateur.
+        :type username: str
+        :param email: L'adresse email de l'utilisateur.
+        :type email: str
+        """
+        with self._ctx_lock:
+            self._ctx_cache.pop((username, email), None)
+            self._sans_historique.pop((username, email), None)
 
-        context = f"HISTORIQUE DES CONVERSATIONS (24h) - Utilisateur: {username}\n"
-        context += "=" * 60 + "\n"
+    def _formater_historique(self, username: str, email: str, max_conversations: int) -> str:
+        """
+        Construit le texte du contexte d'historique (sans cache), voir ``format_history_for_context``.
+        Un utilisateur dont l'historique 24h est lu vide est mémorisé dans ``_sans_historique``
+        pendant ``_TTL_CONTEXTE`` secondes.
 
-        for i, conv in enumerate(history, 1):
-            timestamp = conv['timestamp']
-            if isinstance(timestamp, str):
-                # Parse si c'est une string
-                try:
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                except:
-                    timestamp = "N/A"
+        :param username: Le nom d'utilisateur.
+        :type username: str
+        :param email: L'adresse email de l'utilisateur.
+        :type email: str
+        :param max_conversations: Le nombre maximum de conversations à inclure.
+        :type max_conversations: int
+        :return: Le contexte formaté.
+        :rtype: str
+        """
+        try:
+            history = self._lire_historique_24h(username, email, max_conversations, _SQL_HISTORY_CONTEXTE)
+        except Exception as e:
+            logger.error(f" Erreur récupération historique: {e}")
+            return _CONTEXTE_SANS_HISTORIQUE
 
-            context += f"\n[CONVERSATION {i}] - {timestamp}\n"
-            context += f"Q: {conv['question']}\n"
-            context += f"R: {conv['reponse'][:200]}{'...' if len(conv['reponse']) > 200 else ''}\n"
-            context += "-" * 40 + "\n"
+        if not history:
+            maintenant = time.monotonic()
+            with self._ctx_lock:
+                cle = (username, email)
+                # Réinsertion en fin de dict : l'éviction retire bien la lecture la plus ancienne
+                self._sans_historique.pop(cle, None)
+                if len(self._sans_historique) >= _TAILLE_MAX_CACHE_CONTEXTE:
+                    del self._sans_historique[next(iter(self._sans_historique))]
+                self._sans_historique[cle] = maintenant
+            return _CONTEXTE_SANS_HISTORIQUE
+
+        # Construction par morceaux puis un seul join (évite les recopies successives de +=)
+        parts = [
+            f"HISTORIQUE DES CONVERSATIONS (24h) - Utilisateur: {username}\n",
+            _SEPARATEUR_CONTEXTE,
+        ]
+
+        for i, (question, extrait, tronquee, timestamp) in enumerate(history, 1):
+            parts.append(f"\n[CONVERSATION {i}] - {datetime.fromtimestamp(timestamp)}\n")
+            parts.append(f"Q: {question}\n")
+            parts.append(f"R: {extrait}{'...' if tronquee else ''}\n")
+            parts.append(_SEPARATEUR_CONVERSATION)
+
+        parts.append(f"\nTotal: {len(history)} conversation(s) récente(s)\n")
+        parts.append(_SEPARATEUR_CONTEXTE + "\n")
+
+        return "".join(parts)
+
+    def search_user_conversations(self, username: str, email: str, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Recherche dans les conversations d'un utilisateur celles dont la question ou la réponse
+        contient tous les mots de ``query`` (insensible à la casse et aux accents), les plus
+        pertinentes en premier.
 
-        context += f"\nTotal: {len(history)} conversation(s) récente(s)\n"
-        context += "=" * 60 + "\n\n"
+        :param username: Le nom d'utilisateur.
+        :type username: str
+        :param email: L'adresse email de l'utilisateur.
+        :type email: str
+        :param query: Les mots recherchés.
+        :type query: str
+        :param limit: Le nombre maximum de conversations renvoyées. Par défaut, 20.
+        :type limit: int
+        :return: Une liste de dictionnaires avec les clés 'question', 'reponse', 'timestamp' et
+            'session_id', ou une liste vide si rien ne correspond, en cas d'erreur ou sans FTS5.
+        :rtype: List[Dict]
+        """
+        # Chaque mot est cité pour que la saisie utilisateur ne soit pas interprétée
+        # comme de la syntaxe FTS5 (opérateurs, guillemets, parenthèses...)
+        expression = " ".join('"' + mot.replace('"', '""') + '"' for mot in query.split())
+        if not self._fts_disponible or not expression:
+            return []
+
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(_SQL_SEARCH_USER, (expression, username, email, limit))
+                return [
+                    {'question': q, 'reponse': r, 'timestamp': _depuis_epoch(t), 'session_id': sid}
+                    for q, r, t, sid in cursor
+                ]
 
-        return context
+        except Exception as e:
+            logger.error(f" Erreur recherche conversations: {e}")
+            return []
 
     def get_conversation_stats(self, username: str, email: str) -> Dict:
         """
@@ -282,38 +796,16 @@ class ConversationMemoryStore:
         """
         try:
             with self._get_connection() as conn:
-                # Total conversations
-                cursor = conn.execute("""
-                                      SELECT COUNT(*) as total
-                                      FROM conversations
-                                      WHERE username = ?
-                                        AND email = ?
-                                      """, (username, email))
-                total = cursor.fetchone()['total']
-
-                # Conversations 24h
-                cutoff_time = datetime.now() - timedelta(hours=24)
-                cursor = conn.execute("""
-                                      SELECT COUNT(*) as recent
-                                      FROM conversations
-                                      WHERE username = ?
-                                        AND email = ?
-                                        AND timestamp >= ?
-                                      """, (username, email, cutoff_time))
-                recent = cursor.fetchone()['recent']
-
-                # Dernière conversation
-                cursor = conn.execute("""
-                                      SELECT timestamp, question
-                                      FROM conversations
-                                      WHERE username = ? AND email = ?
-                                      ORDER BY timestamp DESC LIMIT 1
-                                      """, (username, email))
-                last_row = cursor.fetchone()
-                last_conversation = {
-                    'timestamp': last_row['timestamp'] if last_row else None,
-                    'question': last_row['question'] if last_row else None
-                } if last_row else None
+                # Total, conversations 24h et dernière conversation en une seule requête
+                cutoff_time = _epoch_avant(_FENETRE_24H)
+                total, recent, last_timestamp, last_question = conn.execute(
+                    _SQL_STATS, (cutoff_time, username, email, username, email)
+                ).fetchone()
+
+            last_conversation = {
+                'timestamp': _depuis_epoch(last_timestamp),
+                'question': last_question
+            } if total else None
 
             return {
                 'total_conversations': total,
@@ -339,16 +831,27 @@ class ConversationMemoryStore:
         :rtype: int
         """
         try:
-            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+            cutoff_date = _epoch_avant(timedelta(days=days_to_keep))
 
             with self._get_connection() as conn:
-                cursor = conn.execute("""
-                                      DELETE
-                                      FROM conversations
-                                      WHERE timestamp < ?
-                                      """, (cutoff_date,))
-                deleted_count = cursor.rowcount
-                conn.commit()
+                # Paquets courts : les sauvegardes de conversations peuvent s'intercaler
+                deleted_count = 0
+                while True:
+                    supprimees = conn.execute(_SQL_CLEANUP, (cutoff_date, _TAILLE_LOT_NETTOYAGE)).rowcount
+                    conn.commit()
+                    deleted_count += supprimees
+                    if supprimees < _TAILLE_LOT_NETTOYAGE:
+                        break
+                    time.sleep(0)
+
+                # Après une purge importante, les statistiques du planificateur sont périmées
+                if deleted_count >= _SEUIL_ANALYZE_NETTOYAGE:
+                    conn.execute("ANALYZE conversations")
+                    conn.commit()
+
+            if deleted_count:
+                with self._ctx_lock:
+                    self._ctx_cache.clear()
 
             logger.info(f" Nettoyage: {deleted_count} conversations supprimées (> {days_to_keep} jours)")
             return deleted_count
@@ -370,12 +873,8 @@ class ConversationMemoryStore:
         """
         try:
             with self._get_connection() as conn:
-                cursor = conn.execute("""
-                                      SELECT DISTINCT username, email
-                                      FROM conversations
-                                      ORDER BY username
-                                      """)
-                return [(row['username'], row['email']) for row in cursor.fetchall()]
+                cursor = conn.execute(_SQL_ALL_USERS)
+                return cursor.fetchall()
 
         except Exception as e:
             logger.error(f" Erreur liste utilisateurs: {e}")
@@ -401,15 +900,12 @@ class ConversationMemoryStore:
         """
         try:
             with self._get_connection() as conn:
-                cursor = conn.execute("""
-                                      DELETE
-                                      FROM conversations
-                                      WHERE username = ?
-                                        AND email = ?
-                                      """, (username, email))
+                cursor = conn.execute(_SQL_DELETE_USER, (username, email))
                 deleted_count = cursor.rowcount
                 conn.commit()
 
+            self._invalider_contexte(username, email)
+
             logger.info(f" {deleted_count} conversations supprimées pour {username}")
             return deleted_count
 
@@ -423,9 +919,8 @@ class ConversationMemoryStore:
         nom d'utilisateur et de son email. Les conversations sont triées par ordre décroissant de leur
         horodatage.
 
-        Cette méthode effectue une requête SQL pour récupérer les conversations correspondantes dans la
-        base de données, puis les formate sous forme de liste de dictionnaires, où chaque dictionnaire
-        représente une conversation.
+        Cette méthode matérialise ``iter_user_conversations`` sous forme de liste de dictionnaires,
+        où chaque dictionnaire représente une conversation.
 
         :param username: Le nom d'utilisateur pour lequel les conversations doivent être exportées.
         :param email: L'adresse e-mail associée à l'utilisateur pour l'extraction des conversations.
@@ -433,34 +928,59 @@ class ConversationMemoryStore:
                  liste vide en cas d'erreur.
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.execute("""
-                                      SELECT *
-                                      FROM conversations
-                                      WHERE username = ?
-                                        AND email = ?
-                                      ORDER BY timestamp DESC
-                                      """, (username, email))
-
-                conversations = []
-                for row in cursor.fetchall():
-                    conversations.append({
-                        'id': row['id'],
-                        'username': row['username'],
-                        'email': row['email'],
-                        'question': row['question'],
-                        'reponse': row['reponse'],
-                        'timestamp': row['timestamp'],
-                        'session_id': row['session_id'],
-                        'created_at': row['created_at']
-                    })
-
-            return conversations
+            return list(self.iter_user_conversations(username, email))
 
         except Exception as e:
             logger.error(f" Erreur export: {e}")
             return []
 
+    def iter_user_conversations(self, username: str, email: str) -> Iterator[Dict]:
+        """
+        Parcourt les conversations d'un utilisateur une à une, de la plus récente à la plus
+        ancienne, sans charger l'ensemble des lignes en mémoire (export vers un fichier...).
+
+        La connexion reste empruntée au pool tant que l'itération n'est pas terminée ou que le
+        générateur n'est pas fermé.
+
+        :param username: Le nom d'utilisateur pour lequel les conversations doivent être exportées.
+        :type username: str
+        :param email: L'adresse e-mail associée à l'utilisateur.
+        :type email: str
+        :return: Un itérateur de dictionnaires, un par conversation.
+        :rtype: Iterator[Dict]
+        :raises Exception: Si la lecture en base échoue.
+        """
+        with self._get_connection() as conn:
+            for row in conn.execute(_SQL_EXPORT_USER, (username, email)):
+                conversation = dict(zip(_COLONNES_EXPORT, row))
+                conversation['timestamp'] = _depuis_epoch(conversation['timestamp'])
+                yield conversation
+
+    def get_conversation(self, conversation_id: int) -> Optional[Dict]:
+        """
+        Récupère une conversation complète par son identifiant, réponse non tronquée comprise
+        (l'historique servi au contexte ne lit que les 200 premiers caractères de la réponse).
+
+        :param conversation_id: L'identifiant renvoyé par ``save_conversation``.
+        :type conversation_id: int
+        :return: Un dictionnaire avec les mêmes clés que ``export_user_conversations``, ou None
+            si la conversation n'existe pas ou en cas d'erreur.
+        :rtype: Optional[Dict]
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(_SQL_CONVERSATION_BY_ID, (conversation_id,)).fetchone()
+                if row is None:
+                    return None
+
+                conversation = dict(zip(_COLONNES_EXPORT, row))
+                conversation['timestamp'] = _depuis_epoch(conversation['timestamp'])
+                return conversation
+
+        except Exception as e:
+            logger.error(f" Erreur lecture conversation {conversation_id}: {e}")
+            return None
+
     def check_database_health(self) -> Dict:
         """
         Vérifie l'état de santé de la base de données et retourne des statistiques détaillées sur son utilisation. Cette
@@ -477,26 +997,39 @@ class ConversationMemoryStore:
         try:
             with self._get_connection() as conn:
                 # Taille de la base
-                cursor = conn.execute("SELECT COUNT(*) as total FROM conversations")
-                total_conversations = cursor.fetchone()['total']
-
-                # Utilisateurs uniques
-                cursor = conn.execute("SELECT COUNT(DISTINCT username, email) as users FROM conversations")
-                total_users = cursor.fetchone()['users']
+                cursor = conn.execute(_SQL_HEALTH_TOTAL)
+                total_conversations = cursor.fetchone()[0]
+
+                # Utilisateurs uniques (mis en cache : endpoint de santé potentiellement interrogé souvent)
+                maintenant = time.monotonic()
+                if self._cache_utilisateurs and self._cache_utilisateurs[0] > maintenant:
+                    total_users = self._cache_utilisateurs[1]
+                else:
+                    cursor = conn.execute(_SQL_HEALTH_USERS)
+                    total_users = cursor.fetchone()[0]
+                    self._cache_utilisateurs = (maintenant + _TTL_UTILISATEURS_UNIQUES, total_users)
 
                 # Conversations récentes (24h)
-                cutoff_time = datetime.now() - timedelta(hours=24)
-                cursor = conn.execute("SELECT COUNT(*) as recent FROM conversations WHERE timestamp >= ?",
-                                      (cutoff_time,))
-                recent_conversations = cursor.fetchone()['recent']
+                cutoff_time = _epoch_avant(_FENETRE_24H)
+                cursor = conn.execute(_SQL_HEALTH_RECENT, (cutoff_time,))
+                recent_conversations = cursor.fetchone()[0]
 
-                # Taille du fichier
-                file_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+                # Taille de la base vue par SQLite : inclut les pages encore dans le journal WAL
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                file_size = page_count * page_size
+
+            # Taille du journal WAL sur disque (absent hors mode WAL ou après un checkpoint complet)
+            try:
+                wal_size = os.path.getsize(self.db_path + "-wal")
+            except OSError:
+                wal_size = 0
 
             return {
                 'database_path': os.path.abspath(self.db_path),
                 'file_size_bytes': file_size,
                 'file_size_mb': round(file_size / 1024 / 1024, 2),
+                'wal_size_bytes': wal_size,
                 'total_conversations': total_conversations,
                 'total_users': total_users,
                 'conversations_24h': recent_conversations,
@@ -512,8 +1045,28 @@ class ConversationMemoryStore:
             }
 
 
-# Instance globale du memory store
-conversation_memory = ConversationMemoryStore()
+# Instance globale du memory store, créée au premier usage : importer le module
+# n'ouvre ni ne crée conversations.db
+@lru_cache(maxsize=None)
+def get_conversation_memory() -> ConversationMemoryStore:
+    """
+    Retourne l'instance globale du memory store, créée au premier appel.
+
+    :return: Le store de conversations partagé par le processus.
+    :rtype: ConversationMemoryStore
+    """
+    store = ConversationMemoryStore()
+    # Fermeture (et PRAGMA optimize) à l'arrêt du processus, et seulement si le store a
+    # été créé : le store est partagé, aucune instance de chatbot ne le ferme elle-même
+    atexit.register(store.close)
+    return store
+
+
+def __getattr__(name: str):
+    # Compatibilité : ``from ...memory_store import conversation_memory`` reste possible
+    if name == "conversation_memory":
+        return get_conversation_memory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Fonctions utilitaires pour compatibilité
@@ -539,7 +1092,7 @@ def save_conversation(username: str, email: str, question: str, reponse: str, se
         False sinon.
     :rtype: bool
     """
-    return conversation_memory.save_conversation(username, email, question, reponse, session_id)
+    return get_conversation_memory().save_conversation(username, email, question, reponse, session_id) is not None
 
 
 def get_user_context(username: str, email: str) -> str:
@@ -556,7 +1109,7 @@ def get_user_context(username: str, email: str) -> str:
     :return: Une chaîne formatée représentant le contexte utilisateur.
     :rtype: str
     """
-    return conversation_memory.format_history_for_context(username, email)
+    return get_conversation_memory().format_history_for_context(username, email)
 
 
 def get_user_stats(username: str, email: str) -> Dict:
@@ -575,4 +1128,4 @@ def get_user_stats(username: str, email: str) -> Dict:
         associées à l'utilisateur.
     :rtype: Dict
     """
-    return conversation_memory.get_conversation_stats(username, email)
\ No newline at end of file
+    return get_conversation_memory().get_conversation_stats(username, email)
\ No newline at end of file
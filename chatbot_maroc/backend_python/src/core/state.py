@@ -1,5 +1,28 @@
 import pandas as pd
-from typing import Dict, List, Optional, TypedDict, Any
+from typing import Annotated, Dict, List, Optional, TypedDict, Any
+
+
+def fusionner_historique(actuel: List[str], nouveau: List[str]) -> List[str]:
+    """
+    Reducer LangGraph du champ ``historique``.
+
+    Les agents ajoutent leurs messages en place puis renvoient l'état complet : la
+    liste reçue prolonge alors la liste courante et la remplace. Une liste qui ne la
+    prolonge pas (par exemple ``{"historique": [message]}`` renvoyé par une branche
+    parallèle) est ajoutée à la suite, sans écraser les messages des autres branches.
+
+    :param actuel: Historique courant du graphe.
+    :type actuel: List[str]
+    :param nouveau: Historique renvoyé par un nœud.
+    :type nouveau: List[str]
+    :return: L'historique fusionné.
+    :rtype: List[str]
+    """
+    if nouveau is actuel or not nouveau:
+        return actuel
+    if nouveau[:len(actuel)] == actuel:
+        return nouveau
+    return actuel + nouveau
 
 
 # =============================================================================
@@ -58,6 +81,9 @@ class ChatbotState(TypedDict):
     :type erreur_pandas: Optional[str]
     :ivar reponse_finale: Réponse finale générée par le chatbot pour l'utilisateur.
     :type reponse_finale: str
+    :ivar synthese_reussie: Vrai si la réponse finale provient d'une synthèse Gemini
+        non vide (et non d'un fallback) ; seule une telle réponse est mise en cache.
+    :type synthese_reussie: bool
     :ivar historique: Liste des étapes et logs pour une analyse de débogage.
     :type historique: List[str]
     :ivar fichiers_gemini: Liste des fichiers destinés à être uploadés au service Gemini.
@@ -103,6 +129,10 @@ class ChatbotState(TypedDict):
     :type sources_pdf: List[str]
     :ivar excel_empty: Indique l'absence éventuelle de données dans un document Excel.
     :type excel_empty: str
+
+    L'état reste un ``TypedDict`` (et non une dataclass à ``__slots__``) : les agents
+    lisent et écrivent les champs par clé puis renvoient l'état complet sous forme
+    de dictionnaire ; une dataclass imposerait de réécrire chaque agent.
     """
 
     # ========================================
@@ -127,7 +157,8 @@ class ChatbotState(TypedDict):
     resultat_pandas: Optional[Any]  # Résultat du code pandas
     erreur_pandas: Optional[str]  # Erreur si pandas échoue
     reponse_finale: str  # Réponse finale à l'utilisateur
-    historique: List[str]  # Log des étapes pour debug
+    synthese_reussie: bool  # Réponse issue d'une synthèse Gemini réussie (cachable)
+    historique: Annotated[List[str], fusionner_historique]  # Log des étapes pour debug
     fichiers_gemini: List[Any]  # Fichiers à upload à Gemini
     fichiers_csvs_local: List[Any]  # Fichiers utile pour pouvoir uploader à Gemini
     documents_trouves: List[Dict]  # TOUS les documents trouvés
@@ -1,30 +1,91 @@
-import json
+import logging
+import mmap
+import multiprocessing
 import os
+import re
+import shelve
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import zip_longest
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Nombre de tableaux envoyés d'un coup à un processus du pool (moins d'allers-retours IPC)
+_TAILLE_PAQUET_POOL = 8
+
+# Taille (octets) à partir de laquelle un fichier JSON est décodé depuis une projection
+# mémoire : pas de copie du fichier en mémoire ; en dessous, read() coûte moins que le mmap
+_SEUIL_MMAP = 64 * 1024
+
+# Cache disque des descriptions, créé à côté du fichier d'index. La version fait partie de
+# la clé : à incrémenter quand le contenu des descriptions change, pour tout recalculer.
+_NOM_CACHE_DESCRIPTIONS = "descriptions_cache"
+_VERSION_CACHE_DESCRIPTIONS = 3
+
+# Clés du JSON d'un tableau qui ne sont pas recopiées telles quelles dans les métadonnées
+_CLES_HORS_METADATA = frozenset({'tableau', 'fichier_source', 'nom_feuille', 'titre_contextuel', 'range_bloc'})
+
+# Villes/Régions (heuristique simple) : une seule expression compilée au chargement du module,
+# une valeur est parcourue une fois au lieu d'une recherche de sous-chaîne par ville
+_VILLES_MAROC = ('casablanca', 'rabat', 'fès', 'marrakech', 'agadir', 'tanger', 'meknès', 'oujda')
+_VILLES_RE = re.compile('|'.join(map(re.escape, _VILLES_MAROC)))
+
+# Nombre écrit en texte (virgule ou point décimal, exposant) : couvre le cas courant par une
+# expression compilée ; float() ne sert plus que de repli, pour garder sa sémantique exacte
+# ('nan', 'inf', '1_000'...) sans lever ValueError pour chaque valeur décimale ordinaire
+_NOMBRE_RE = re.compile(r'[+-]?(?:\d+(?:[.,]\d*)?|[.,]\d+)(?:e[+-]?\d+)?')
+
+# Types reconnus par detecter_type_dominant, dans l'ordre retenu en cas d'égalité, et leurs
+# indices dans la liste des compteurs (pas de dictionnaire recréé à chaque appel)
+_TYPES_DETECTES = ('numerique', 'texte', 'pourcentage', 'ville')
+_NUMERIQUE, _TEXTE, _POURCENTAGE, _VILLE = range(len(_TYPES_DETECTES))
+
 
 def __init__():
     pass
 
 
-def generer_description_tableau(tableau_path: str) -> Dict[str, Any]:
+def _charger_json(chemin: str) -> Any:
+    """
+    Charge un fichier JSON avec orjson (décodage nettement plus rapide que le module json),
+    à partir des octets bruts du fichier. Les gros fichiers sont décodés directement depuis
+    une projection mémoire (``mmap``), sans copie intermédiaire.
+
+    :param chemin: Chemin du fichier JSON.
+    :return: Le contenu décodé (dictionnaires et listes Python natifs).
+    :raises orjson.JSONDecodeError: Si le fichier n'est pas un JSON valide (sous-classe de
+        json.JSONDecodeError).
+    """
+    with open(chemin, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < _SEUIL_MMAP:
+            return orjson.loads(f.read())
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as projection, memoryview(projection) as vue:
+            return orjson.loads(vue)
+
+
+def generer_description_tableau(tableau_path: str, chemin_fichier: Optional[str] = None) -> Dict[str, Any]:
     """
     Génère une description pour un tableau JSON donné. Cette fonction lit un fichier JSON, extrait
     les informations métadonnées, analyse le contenu du tableau et génère une description textuelle
     ainsi que des statistiques sur le tableau.
 
-    :param tableau_path: Chemin du fichier JSON contenant les données du tableau.
+    :param tableau_path: Chemin du fichier JSON contenant les données du tableau, tel qu'enregistré
+        dans les métadonnées.
+    :param chemin_fichier: Chemin effectivement lu, si différent de ``tableau_path`` (par exemple
+        résolu depuis PROJECT_DIR sans changer de répertoire courant). Par défaut, ``tableau_path``.
     :return: Un dictionnaire contenant la description textuelle, les métadonnées, les statistiques
              et un échantillon des données du tableau.
 
     """
     # Charger le tableau JSON
-    with open(tableau_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = _charger_json(chemin_fichier or tableau_path)
 
     metadata = {
         # Champs originaux
@@ -41,17 +102,13 @@ def generer_description_tableau(tableau_path: str) -> Dict[str, Any]:
         'permissions_list': data.get('permissions_list'),
         'detected_from_path': data.get('detected_from_path'),
         'extraction_timestamp': data.get('extraction_timestamp'),
-
-
-        **{k: v for k, v in data.items() if k not in [
-            'tableau', 'fichier_source', 'nom_feuille', 'titre_contextuel', 'range_bloc'
-        ]}
     }
+    # Tous les autres champs du JSON, recopiés en un seul passage (sans dictionnaire intermédiaire)
+    metadata.update((k, v) for k, v in data.items() if k not in _CLES_HORS_METADATA)
 
     if metadata.get('access_level'):
-        print(f"DEBUG description.py: {tableau_path}")
-        print(f"  access_level trouvé: {metadata.get('access_level')}")
-        print(f"  access_indicator: {metadata.get('access_indicator')}")
+        logger.debug("%s: access_level trouvé: %s, access_indicator: %s",
+                     tableau_path, metadata.get('access_level'), metadata.get('access_indicator'))
 
     # Extraire le tableau
     tableau_data = data.get('tableau', [])
@@ -63,28 +120,23 @@ def generer_description_tableau(tableau_path: str) -> Dict[str, Any]:
             'stats': {'nb_lignes': 0, 'nb_colonnes': 0}
         }
 
-    # Analyse du tableau
-    nb_lignes = len(tableau_data)
-    nb_colonnes = len(tableau_data[0]) if tableau_data else 0
-
-    # Première ligne = headers (souvent)
-    headers = tableau_data[0] if tableau_data else []
-    data_rows = tableau_data[1:] if len(tableau_data) > 1 else []
+    # Première ligne = headers (souvent) ; tableau non vide garanti ci-dessus. Les lignes de
+    # données ne sont jamais copiées en entier : seules les tranches utiles sont extraites.
+    headers = tableau_data[0]
 
     # Nettoyer et analyser les headers
     headers_clean = [str(h).strip() if h is not None else "Colonne_vide" for h in headers]
 
     # Échantillon de données (3-5 lignes max)
-    echantillon_size = min(5, len(data_rows))
-    echantillon = data_rows[:echantillon_size]
+    echantillon = tableau_data[1:6]
 
-    # Analyse des types de données par colonne
-    types_colonnes = analyser_types_colonnes(data_rows, headers_clean)
+    # Analyse des types de données par colonne (10 premières lignes de données)
+    types_colonnes = analyser_types_colonnes(tableau_data[1:11], headers_clean)
 
     # Statistiques basiques
     stats = {
-        'nb_lignes': nb_lignes - 1,  # -1 pour exclure header
-        'nb_colonnes': nb_colonnes,
+        'nb_lignes': len(tableau_data) - 1,  # -1 pour exclure header
+        'nb_colonnes': len(headers),
         'headers': headers_clean,
         'types_colonnes': types_colonnes
     }
@@ -119,16 +171,14 @@ def analyser_types_colonnes(data_rows: List[List], headers: List[str]) -> Dict[s
         return {}
 
     types_colonnes = {}
-    nb_cols = len(headers)
 
-    for col_idx in range(nb_cols):
-        col_name = headers[col_idx]
+    # Échantillon (max 10 lignes) transposé une seule fois en colonnes, les lignes
+    # plus courtes étant complétées par None
+    colonnes = list(zip_longest(*data_rows[:10]))
 
+    for col_idx, col_name in enumerate(headers):
         # Échantillonner quelques valeurs de cette colonne
-        valeurs = []
-        for row in data_rows[:10]:  # Analyser max 10 lignes
-            if col_idx < len(row) and row[col_idx] is not None:
-                valeurs.append(row[col_idx])
+        valeurs = [v for v in colonnes[col_idx] if v is not None] if col_idx < len(colonnes) else []
 
         if not valeurs:
             types_colonnes[col_name] = "vide"
@@ -164,35 +214,43 @@ def detecter_type_dominant(valeurs: List[Any]) -> str:
     if not valeurs:
         return "vide"
 
-    types_counts = {'numerique': 0, 'texte': 0, 'pourcentage': 0, 'ville': 0}
+    types_counts = [0] * len(_TYPES_DETECTES)
 
     for val in valeurs:
+        # Nombres déjà typés par le décodage JSON : numériques sans passer par leur texte
+        # (type exact : les booléens, sous-classe de int, restent traités comme du texte)
+        if type(val) in (int, float):
+            types_counts[_NUMERIQUE] += 1
+            continue
+
         val_str = str(val).strip().lower()
 
         # Numérique
+        if _NOMBRE_RE.fullmatch(val_str):
+            types_counts[_NUMERIQUE] += 1
+            continue
         try:
             float(val_str.replace(',', '.'))
-            types_counts['numerique'] += 1
+            types_counts[_NUMERIQUE] += 1
             continue
         except ValueError:
             pass
 
         # Pourcentage
         if '%' in val_str or 'pourcentage' in val_str:
-            types_counts['pourcentage'] += 1
+            types_counts[_POURCENTAGE] += 1
             continue
 
         # Villes/Régions (heuristique simple)
-        villes_maroc = ['casablanca', 'rabat', 'fès', 'marrakech', 'agadir', 'tanger', 'meknès', 'oujda']
-        if any(ville in val_str for ville in villes_maroc):
-            types_counts['ville'] += 1
+        if _VILLES_RE.search(val_str):
+            types_counts[_VILLE] += 1
             continue
 
         # Par défaut : texte
-        types_counts['texte'] += 1
+        types_counts[_TEXTE] += 1
 
     # Retourner le type dominant
-    return max(types_counts.items(), key=lambda x: x[1])[0]
+    return _TYPES_DETECTES[types_counts.index(max(types_counts))]
 
 
 def construire_description_textuelle(metadata: Dict, stats: Dict, echantillon: List[List]) -> str:
@@ -228,14 +286,13 @@ def construire_description_textuelle(metadata: Dict, stats: Dict, echantillon: L
     :return: Une chaîne de caractères structurée décrivant les métadonnées, statistiques, et
              un échantillon du tableau.
     """
-    desc_parts = []
-
-    # Contexte et source
-    desc_parts.append(f"CONTEXTE: {metadata['titre_contextuel']}")
-    desc_parts.append(f"SOURCE: Fichier '{metadata['fichier_source']}', Feuille '{metadata['nom_feuille']}'")
-
-    # Structure du tableau
-    desc_parts.append(f"DONNÉES: Tableau de {stats['nb_lignes']} entrées avec {stats['nb_colonnes']} colonnes")
+    desc_parts = [
+        # Contexte et source
+        f"CONTEXTE: {metadata['titre_contextuel']}",
+        f"SOURCE: Fichier '{metadata['fichier_source']}', Feuille '{metadata['nom_feuille']}'",
+        # Structure du tableau
+        f"DONNÉES: Tableau de {stats['nb_lignes']} entrées avec {stats['nb_colonnes']} colonnes",
+    ]
 
     # Colonnes disponibles
     if stats['headers']:
@@ -244,20 +301,73 @@ def construire_description_textuelle(metadata: Dict, stats: Dict, echantillon: L
 
     # Types de données
     if stats['types_colonnes']:
-        types_str = ', '.join([f"{col}({type_})" for col, type_ in stats['types_colonnes'].items()])
+        types_str = ', '.join(f"{col}({type_})" for col, type_ in stats['types_colonnes'].items())
         desc_parts.append(f"TYPES: {types_str}")
 
     # Échantillon de données
     if echantillon:
         desc_parts.append("ÉCHANTILLON:")
         for i, row in enumerate(echantillon[:3]):  # Max 3 lignes d'échantillon
-            row_clean = [str(cell) if cell is not None else "N/A" for cell in row]
-            desc_parts.append(f"  Ligne {i + 1}: {' | '.join(row_clean[:5])}")  # Max 5 cols
+            # Max 5 cols : seules les cellules affichées sont converties en texte
+            row_clean = [str(cell) if cell is not None else "N/A" for cell in row[:5]]
+            desc_parts.append(f"  Ligne {i + 1}: {' | '.join(row_clean)}")
 
     return '\n'.join(desc_parts)
 
 
-def traiter_index_complet(index_path: str, tableaux_dir: str) -> List[Dict]:
+def _decrire_tableau_isole(tableau_path: str, chemin_fichier: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Exécutée dans un processus du pool : l'erreur éventuelle est renvoyée au lieu d'être levée,
+    pour qu'un tableau invalide n'interrompe pas le traitement des autres.
+
+    :param tableau_path: Chemin du tableau enregistré dans les métadonnées.
+    :param chemin_fichier: Chemin du fichier JSON à lire.
+    :return: Le couple (description, None) en cas de succès, (None, message d'erreur) sinon.
+    """
+    try:
+        return generer_description_tableau(tableau_path, chemin_fichier), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _cle_cache_description(tableau_path: str, chemin_fichier: str) -> Optional[str]:
+    """
+    Clé du cache disque pour un tableau : chemin, date de modification et taille du fichier.
+    Un fichier modifié change de clé, son ancienne description n'est donc jamais réutilisée.
+    L'unique ``stat`` effectué sert aussi de test d'existence du fichier.
+
+    :param tableau_path: Chemin du tableau enregistré dans les métadonnées.
+    :param chemin_fichier: Chemin du fichier JSON à lire.
+    :return: La clé, ou None si le fichier n'existe pas ou n'est pas accessible.
+    """
+    try:
+        st = os.stat(chemin_fichier)
+    except OSError:
+        return None
+    return (f"{_VERSION_CACHE_DESCRIPTIONS}|{tableau_path}|{os.path.abspath(chemin_fichier)}"
+            f"|{st.st_mtime_ns}|{st.st_size}")
+
+
+def _ouvrir_cache_descriptions(index_path: str, utiliser_cache: bool):
+    """
+    Ouvre le cache disque des descriptions (module ``shelve``) situé à côté de l'index.
+
+    :param index_path: Chemin du fichier JSON de l'index.
+    :param utiliser_cache: Si False, aucun fichier n'est ouvert.
+    :return: Un gestionnaire de contexte donnant un mapping clé -> description : le cache
+        disque, ou un simple dictionnaire vide si le cache est désactivé ou inaccessible.
+    """
+    if utiliser_cache:
+        chemin = Path(index_path).with_name(_NOM_CACHE_DESCRIPTIONS)
+        try:
+            return shelve.open(str(chemin))
+        except Exception as e:
+            logger.warning("Cache des descriptions indisponible (%s): %s", chemin, e)
+    return nullcontext({})
+
+
+def traiter_index_complet(index_path: str, tableaux_dir: str, max_workers: Optional[int] = None,
+                          utiliser_cache: bool = True) -> List[Dict]:
     """
     Traite un index JSON et génère des descriptions pour chaque tableau référencé dans
     l'index. Chaque tableau est représenté par un fichier JSON localisé dans un dossier
@@ -265,10 +375,20 @@ def traiter_index_complet(index_path: str, tableaux_dir: str) -> List[Dict]:
 
     Ce traitement parcourt chaque élément de l'index fourni, vérifie la validité des
     chemins vers les fichiers JSON des tableaux et procède à la génération de descriptions
-    pour ceux qui existent.
+    pour ceux qui existent. Les descriptions sont générées en parallèle dans un pool de
+    processus (lecture JSON et analyse des types sont liées au CPU), dans l'ordre de l'index.
+    Les descriptions des fichiers inchangés depuis le passage précédent sont relues depuis
+    un cache disque au lieu d'être recalculées.
+
+    Les chemins relatifs sont résolus depuis le dossier PROJECT_DIR (le répertoire courant
+    si la variable n'est pas définie), sans changer le répertoire courant du processus.
+    Les ``tableau_path`` enregistrés restent relatifs (``tableaux_dir/<chemin de l'index>``).
 
     :param index_path: Chemin vers le fichier JSON contenant l'index des données.
     :param tableaux_dir: Chemin vers le dossier contenant les fichiers JSON des tableaux.
+    :param max_workers: Nombre de processus du pool. Par défaut, le nombre de CPU.
+    :param utiliser_cache: Réutilise et met à jour le cache disque des descriptions
+        (fichier ``descriptions_cache`` à côté de l'index). Par défaut, True.
     :return: Une liste de dictionnaires contenant les descriptions générées pour chaque
         tableau valide.
     :rtype: List[Dict]
@@ -280,12 +400,12 @@ def traiter_index_complet(index_path: str, tableaux_dir: str) -> List[Dict]:
         génération des descriptions des fichiers JSON des tableaux.
     """
     # Charger l'index
-    dir_dossier = os.getenv("PROJECT_DIR")
-    os.chdir(dir_dossier)
-    with open(index_path, 'r', encoding='utf-8') as f:
-        index_data = json.load(f)
+    racine = Path(os.getenv("PROJECT_DIR") or ".")
+    index_complet = racine / index_path
+    index_data = _charger_json(str(index_complet))
 
-    descriptions = []
+    # Tableaux à décrire : (chemin dans l'index, chemin complet, fichier à lire, clé du cache)
+    a_traiter = []
 
     for item in index_data:
         tableau_json_path = item.get('tableau_json', '')
@@ -295,15 +415,48 @@ def traiter_index_complet(index_path: str, tableaux_dir: str) -> List[Dict]:
         # Construire le chemin complet
         full_path = Path(tableaux_dir) / tableau_json_path
 
-        if full_path.exists():
-            try:
-                description = generer_description_tableau(str(full_path))
-                descriptions.append(description)
-                print(f"Traité: {tableau_json_path}")
-            except Exception as e:
-                print(f"Erreur avec {tableau_json_path}: {e}")
+        # Un seul stat par fichier : existence et clé du cache
+        chemin_fichier = str(racine / full_path)
+        cle = _cle_cache_description(str(full_path), chemin_fichier)
+        if cle:
+            a_traiter.append((tableau_json_path, str(full_path), chemin_fichier, cle))
+        else:
+            logger.warning("Fichier non trouvé: %s", full_path)
+
+    descriptions = []
+    if not a_traiter:
+        return descriptions
+
+    with _ouvrir_cache_descriptions(str(index_complet), utiliser_cache) as cache:
+        resultats = [(cache.get(cle), None) for *_, cle in a_traiter]
+
+        # Seuls les tableaux absents du cache sont envoyés au pool
+        manquants = [i for i, (description, _) in enumerate(resultats) if description is None]
+        if manquants:
+            nb_workers = min(max_workers or os.cpu_count() or 1, len(manquants))
+            # « spawn » : un fork depuis un processus multithreadé (torch, chromadb)
+            # peut hériter d'un verrou tenu et bloquer le worker
+            with ProcessPoolExecutor(max_workers=nb_workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                calcules = executor.map(_decrire_tableau_isole,
+                                        [a_traiter[i][1] for i in manquants],
+                                        [a_traiter[i][2] for i in manquants],
+                                        chunksize=_TAILLE_PAQUET_POOL)
+                for i, resultat in zip(manquants, calcules):
+                    resultats[i] = resultat
+                    if resultat[1] is None:
+                        cache[a_traiter[i][3]] = resultat[0]
+
+        # Entrées des fichiers modifiés ou retirés de l'index : le cache ne grossit pas indéfiniment
+        for cle in set(cache) - {cle for *_, cle in a_traiter}:
+            del cache[cle]
+
+    for (tableau_json_path, *_), (description, erreur) in zip(a_traiter, resultats):
+        if erreur is None:
+            descriptions.append(description)
+            logger.debug("Traité: %s", tableau_json_path)
         else:
-            print(f"  Fichier non trouvé: {full_path}")
+            logger.error("Erreur avec %s: %s", tableau_json_path, erreur)
 
     return descriptions
 
@@ -313,8 +466,6 @@ if __name__ == "__main__":
     # Test avec un seul tableau
     # description = generer_description_tableau("output/20230420_Capital Humain au Maroc_V-Final-2/_Ingénieurs/tableau_001.json")
     # print(description['description'])
-    # Traitement complet
-    dir_dossier = os.getenv("PROJECT_DIR")
-    os.chdir(dir_dossier)
+    # Traitement complet (chemins relatifs à PROJECT_DIR)
     descriptions = traiter_index_complet("output/index.json", "output")
     print(f"\n {len(descriptions)} tableaux traités avec succès!")
\ No newline at end of file
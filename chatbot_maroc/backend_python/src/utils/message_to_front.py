@@ -1,10 +1,6 @@
-import sys
 import requests
 import time
 
-sys.path[:0] = ['../../']
-from chatbot_wrapper import send_log
-
 
 def _send_to_frontend(session_id, message, log_level='INFO'):
     """
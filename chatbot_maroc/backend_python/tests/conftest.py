@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Les modules du backend s'importent depuis son dossier racine (``src``, ``config``),
+# comme lorsqu'ils sont lancés par chatbot_wrapper
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
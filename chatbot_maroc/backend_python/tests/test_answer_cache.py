@@ -0,0 +1,69 @@
+import re
+from unittest.mock import Mock
+
+import numpy as np
+
+from src.core.answer_cache import AnswerCache
+from src.core.chatbot_v2_simplified import ChatbotMarocV2Simplified
+
+
+class EmbeddingsSansChiffres:
+    """Modèle d'embeddings factice : sac de mots qui ignore les nombres"""
+
+    VOCABULAIRE = ("exportations", "population", "maroc", "rabat", "fès", "taux", "chômage")
+
+    def encode(self, textes, convert_to_tensor=False):
+        mots = re.findall(r"[^\W\d]+", textes[0])
+        return [np.array([1.0] + [float(mot in mots) for mot in self.VOCABULAIRE])]
+
+
+def _contexte(user_permissions=None, username="u", email="u@amdie.ma"):
+    chatbot = Mock(user_role="employee", _permissions_defaut=("read_internal_docs", "read_public_docs"))
+    return ChatbotMarocV2Simplified._contexte_cache(chatbot, user_permissions, username, email)
+
+
+def test_cache_exact_par_utilisateur():
+    """Test du niveau exact : hit pour le même utilisateur, miss pour un autre"""
+    cache = AnswerCache()
+    cache.set("Population de Rabat ?", _contexte(), "réponse pour u")
+
+    # Question normalisée (casse, espaces) : même entrée
+    assert cache.get("  population de   RABAT ? ", _contexte()) == "réponse pour u"
+    # Le prompt de synthèse inclut l'historique : pas de partage entre utilisateurs
+    assert cache.get("Population de Rabat ?", _contexte(username="v", email="v@amdie.ma")) is None
+
+
+def test_cache_ordre_des_permissions():
+    """Test de la clé de contexte : l'ordre des permissions n'empêche pas un hit"""
+    cache = AnswerCache()
+    cache.set("Population de Rabat ?", _contexte(["read_public_docs", "read_internal_docs"]), "réponse")
+
+    assert cache.get("Population de Rabat ?", _contexte(["read_internal_docs", "read_public_docs"])) == "réponse"
+    # Sans permissions explicites : celles de l'instance, triées de la même façon
+    assert cache.get("Population de Rabat ?", _contexte()) == "réponse"
+    assert cache.get("Population de Rabat ?", _contexte(["read_public_docs"])) is None
+
+
+def test_cache_semantique_nombres_differents():
+    """Test du niveau sémantique : une question voisine avec d'autres nombres n'est pas servie"""
+    cache = AnswerCache(EmbeddingsSansChiffres())
+    cache.set("Exportations du Maroc en 2020 ?", _contexte(), "réponse 2020")
+
+    # Reformulation avec les mêmes nombres : hit sémantique
+    assert cache.get("Les exportations du Maroc en 2020", _contexte()) == "réponse 2020"
+    # Embeddings identiques mais année différente : miss
+    assert cache.get("Exportations du Maroc en 2021 ?", _contexte()) is None
+
+
+def test_cache_invalidation_utilisateur():
+    """Test de l'invalidation des réponses d'un seul utilisateur"""
+    cache = AnswerCache(EmbeddingsSansChiffres())
+    contexte_v = _contexte(username="v", email="v@amdie.ma")
+    cache.set("Taux de chômage à Rabat ?", _contexte(), "réponse u")
+    cache.set("Taux de chômage à Rabat ?", contexte_v, "réponse v")
+
+    assert cache.invalider(lambda contexte: contexte[2:] == ("u", "u@amdie.ma")) == 1
+
+    assert cache.get("Taux de chômage à Rabat ?", _contexte()) is None
+    assert cache.get("Le taux de chômage à Rabat", _contexte()) is None
+    assert cache.get("Taux de chômage à Rabat ?", contexte_v) == "réponse v"
@@ -0,0 +1,137 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+import src.core.chatbot_v2_simplified as chatbot_module
+from config.setting import ChatbotSettings
+from src.core.chatbot_v2_simplified import ChatbotMarocV2Simplified
+
+
+class MorceauGemini:
+    def __init__(self, texte):
+        self.text = texte
+
+
+class GeminiFactice:
+    """Modèle Gemini factice : réponse en deux morceaux streamés"""
+
+    def generate_content(self, prompt, stream=False):
+        return iter([MorceauGemini("Réponse "), MorceauGemini("test")])
+
+
+class RagFactice:
+    """Index RAG factice : un tableau Excel et un PDF publics"""
+
+    def rechercher_tableaux(self, question, user_role, n_results):
+        return {'tableaux': [
+            {'id': 'tableau_1', 'tableau_path': 'tableau_1.json', 'access_level': 'public'},
+            {'id': 'pdf_1', 'tableau_path': 'rapport.pdf', 'access_level': 'public'},
+        ]}
+
+    def get_tableau_data(self, tableau_path):
+        return {'tableau': [['Région', 'Valeur'], ['Rabat', 1]], 'titre_contextuel': 'T', 'fichier_source': 'f.xlsx'}
+
+
+class SelecteurSansDocument:
+    """Sélecteur factice : aucun document retenu, le graphe va directement à la synthèse"""
+
+    def execute(self, state):
+        state['tableaux_pour_upload'] = []
+        state['pdfs_pour_upload'] = []
+        return state
+
+
+class ChatbotDeTest(ChatbotMarocV2Simplified):
+    @property
+    def selector_agent(self):
+        return SelecteurSansDocument()
+
+    def _send_mcp_sync(self, session_id, message_type, content):
+        pass
+
+    def _needs_rag(self, state):
+        # Panne simulée d'un nœud du graphe pour une question donnée
+        if "panne" in state['question_utilisateur']:
+            raise RuntimeError("panne simulée")
+        return super()._needs_rag(state)
+
+
+@pytest.fixture
+def chatbot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(chatbot_module, "_get_gemini_model", lambda: GeminiFactice())
+    settings = ChatbotSettings(gemini_api_key="test", log_dir=str(tmp_path / "logs"),
+                               enable_semantic_cache=False)
+    chatbot = ChatbotDeTest(RagFactice(), user_role="public", settings=settings)
+    yield chatbot
+    chatbot.close()
+
+
+def _triage(question):
+    state = {'question_utilisateur': question, 'historique': []}
+    return ChatbotMarocV2Simplified._needs_rag(Mock(), state)
+
+
+@pytest.mark.parametrize("question", [
+    "bonjour",
+    "Bonjour à tous !",
+    "merci beaucoup",
+    "bonjour, qui es-tu ?",
+    "salut, comment ça va ?",
+])
+def test_triage_message_conversationnel(question):
+    """Test des salutations envoyées directement à la synthèse"""
+    assert _triage(question) == "skip_rag"
+
+
+@pytest.mark.parametrize("question", [
+    "bonjour rabat",
+    "salut agadir",
+    "bonjour, population de Casablanca ?",
+    "merci, et pour 2021 ?",
+])
+def test_triage_question_de_donnees(question):
+    """Test des questions de données qui passent toujours par la recherche RAG"""
+    assert _triage(question) == "need_rag"
+
+
+def test_chargements_excel_et_pdf_en_parallele(chatbot):
+    """Test du fan-out : rag_excel et rag_pdf chargent chacun leurs documents"""
+    etat_initial = chatbot._preparer_etat_initial("Population de Rabat ?", "s1", ["read_public_docs"],
+                                                  "u", "u@amdie.ma")
+
+    etat_final = asyncio.run(chatbot.graph.ainvoke(etat_initial, config={"configurable": {"chatbot": chatbot}}))
+
+    assert len(etat_final['tableaux_charges']) == 1
+    assert len(etat_final['pdfs_charges']) == 1
+    assert etat_final['reponse_finale'] == "Réponse test"
+
+
+def test_batch_erreur_isolee(chatbot):
+    """Test d'un lot : seule la question en erreur reçoit un message d'erreur"""
+    reponses = chatbot.poser_questions_batch(
+        ["Population de Rabat ?", "Question en panne ?", "Taux de chômage à Fès ?"],
+        "s1", username="u", email="u@amdie.ma"
+    )
+
+    assert len(reponses) == 3
+    assert reponses[1].startswith("ERREUR: Erreur système: panne simulée")
+    for reponse in (reponses[0], reponses[2]):
+        assert not reponse.startswith("ERREUR")
+        assert "Réponse test" in reponse
+
+
+def test_stream_un_seul_message_final(chatbot):
+    """Test du streaming : morceaux de synthèse puis un unique message final"""
+    async def collecter():
+        return [morceau async for morceau in chatbot.stream_question(
+            "Population de Rabat ?", "s1", username="u", email="u@amdie.ma")]
+
+    morceaux = asyncio.run(collecter())
+
+    types = [morceau['type'] for morceau in morceaux]
+    assert types.count("final") == 1
+    assert types[-1] == "final"
+    assert "".join(m['content'] for m in morceaux if m['type'] == "token") == "Réponse test"
+    assert "Réponse test" in morceaux[-1]['content']
@@ -0,0 +1,35 @@
+import io
+import logging
+from unittest.mock import Mock
+
+from config.logging import ProgressHandler, ProgressWriter
+
+
+def test_progress_writer_ordre_et_vidage_a_la_fermeture():
+    """Test du writer de progression : lignes écrites dans l'ordre, aucune perdue au close()"""
+    flux = io.StringIO()
+    writer = ProgressWriter(stream=flux, max_batch=8)
+
+    for i in range(100):
+        writer.write(f"PROGRESS:{i}")
+    writer.close()
+    # Après fermeture, l'écriture est directe
+    writer.write("PROGRESS:fin")
+
+    assert flux.getvalue().splitlines() == [f"PROGRESS:{i}" for i in range(100)] + ["PROGRESS:fin"]
+
+
+def test_progress_handler_filtre_les_enregistrements(monkeypatch):
+    """Test du handler : seuls les enregistrements portant ``progress`` sont transmis"""
+    lignes = []
+    monkeypatch.setattr("config.logging.get_progress_writer", lambda: Mock(write=lignes.append))
+
+    logger = logging.getLogger("test_progress_handler")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(ProgressHandler())
+
+    logger.info("journal seul")
+    logger.info("journal", extra={"progress": "Recherche terminée"})
+
+    assert lignes == ["PROGRESS:Recherche terminée"]
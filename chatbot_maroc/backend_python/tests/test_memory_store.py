@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from src.core.memory_store import ConversationMemoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationMemoryStore(str(tmp_path / "conversations.db"), pool_size=2)
+    yield store
+    store.close()
+
+
+def test_migration_base_horodatages_texte(tmp_path):
+    """Test de la migration d'une base existante (horodatages texte) vers l'epoch"""
+    db_path = str(tmp_path / "ancienne.db")
+
+    # Schéma et écriture de la version d'origine : timestamp DATETIME rempli par datetime.now()
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            email TEXT NOT NULL,
+            question TEXT NOT NULL,
+            reponse TEXT NOT NULL,
+            timestamp DATETIME NOT NULL,
+            session_id TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "INSERT INTO conversations (username, email, question, reponse, timestamp, session_id) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ("u", "u@amdie.ma", "Population de Fès ?", "Environ 1,2 million.", str(datetime.now()), "s1")
+    )
+    conn.commit()
+    conn.close()
+
+    store = ConversationMemoryStore(db_path)
+    try:
+        with store._get_connection() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+            type_horodatage, horodatage = conn.execute(
+                "SELECT typeof(timestamp), timestamp FROM conversations"
+            ).fetchone()
+        assert type_horodatage == "integer"
+        assert abs(horodatage - time.time()) < 60
+
+        # La conversation migrée reste dans la fenêtre 24h et dans l'index plein texte
+        historique = store.get_user_history_24h("u", "u@amdie.ma")
+        assert [c['question'] for c in historique] == ["Population de Fès ?"]
+        assert len(store.search_user_conversations("u", "u@amdie.ma", "population")) == 1
+    finally:
+        store.close()
+
+
+def test_recherche_insensible_aux_accents(store):
+    """Test de la recherche plein texte : "fes" trouve "Fès" """
+    store.save_conversation("u", "u@amdie.ma", "Population de Fès ?", "Fès compte 1,2 million d'habitants", "s1")
+    store.save_conversation("u", "u@amdie.ma", "Investissements à Tanger", "Tanger Med ...", "s1")
+    store.save_conversation("v", "v@amdie.ma", "Population de Fès ?", "autre utilisateur", "s2")
+
+    resultats = store.search_user_conversations("u", "u@amdie.ma", "fes")
+
+    assert [r['question'] for r in resultats] == ["Population de Fès ?"]
+    # Syntaxe FTS5 invalide ou requête vide : aucun résultat, sans exception
+    assert store.search_user_conversations("u", "u@amdie.ma", '"AND ( NEAR') == []
+    assert store.search_user_conversations("u", "u@amdie.ma", "   ") == []
+
+
+def test_transaction_annulee_en_cas_d_erreur(store):
+    """Test de transaction() : validée en bloc, annulée si une exception survient"""
+    insertion = ("INSERT INTO conversations (username, email, question, reponse, timestamp) "
+                 "VALUES ('u', 'u@amdie.ma', ?, 'r', ?)")
+
+    with store.transaction() as conn:
+        conn.execute(insertion, ("q1", int(time.time())))
+        conn.execute(insertion, ("q2", int(time.time())))
+
+    with pytest.raises(RuntimeError):
+        with store.transaction() as conn:
+            conn.execute(insertion, ("q3", int(time.time())))
+            raise RuntimeError("échec")
+
+    assert store.get_conversation_stats("u", "u@amdie.ma")['total_conversations'] == 2
+
+
+def test_pool_connexions_concurrentes(store):
+    """Test d'écritures concurrentes plus nombreuses que les connexions du pool"""
+    def sauvegarder(i):
+        store.save_conversation("u", "u@amdie.ma", f"question {i}", "r", "s1")
+
+    threads = [threading.Thread(target=sauvegarder, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.get_conversation_stats("u", "u@amdie.ma")['total_conversations'] == 8
+    assert store._connexions_ouvertes <= store.pool_size